@@ -0,0 +1,75 @@
+"""Compare decode throughput of `panda_value_to_attribute_value` with the
+per-attribute decoders built by `make_panda_value_decoder`.
+
+Run with ``python benchmarks/decode_throughput.py``.
+"""
+
+import enum
+import timeit
+
+from fastcs.datatypes import Bool, Enum, Float, Int, String, Table
+from pandablocks.responses import TableFieldDetails, TableFieldInfo
+from pandablocks.utils import words_to_table
+
+from fastcs_pandablocks.panda.utils import (
+    make_panda_value_decoder,
+    panda_value_to_attribute_value,
+)
+
+NUMBER = 200_000
+
+
+class Labels(enum.Enum):
+    ZERO = "ZERO"
+    ONE = "ONE"
+    PULSE1_OUT = "PULSE1.OUT"
+
+
+TABLE_FIELD_INFO = TableFieldInfo(
+    type="table",
+    subtype=None,
+    description=None,
+    max_length=4096,
+    fields={
+        "REPEATS": TableFieldDetails(subtype="uint", bit_low=0, bit_high=15),
+        "POSITION": TableFieldDetails(subtype="int", bit_low=32, bit_high=63),
+    },
+    row_words=2,
+)
+TABLE_WORDS = ["1", "2"] * 16
+
+CASES = {
+    "String": (String(), "a label"),
+    "Bool": (Bool(), "1"),
+    "Int": (Int(), "1234"),
+    "Int(min, max)": (Int(min=0, max=4096), "1234"),
+    "Float": (Float(), "0.125"),
+    "Enum": (Enum(Labels), "PULSE1_OUT"),
+    "Table (16 rows)": (
+        Table([("repeats", "<u4"), ("position", "<i4")]),
+        TABLE_WORDS,
+    ),
+}
+
+
+def before(datatype, value):
+    if isinstance(value, list):
+        value = words_to_table(value, TABLE_FIELD_INFO, convert_enum_indices=True)
+    return panda_value_to_attribute_value(datatype, value)
+
+
+def main():
+    print(f"{'datatype':<18}{'before (/s)':>14}{'after (/s)':>14}{'speedup':>10}")
+    for name, (datatype, value) in CASES.items():
+        number = NUMBER // 20 if isinstance(datatype, Table) else NUMBER
+        decode = make_panda_value_decoder(datatype, TABLE_FIELD_INFO)
+        before_time = timeit.timeit(lambda: before(datatype, value), number=number)  # noqa: B023
+        after_time = timeit.timeit(lambda: decode(value), number=number)  # noqa: B023
+        print(
+            f"{name:<18}{number / before_time:>14,.0f}{number / after_time:>14,.0f}"
+            f"{before_time / after_time:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compare write throughput and file size of captures written with different
+`DatasetLayout` chunking and compression, for typical PCAP capture widths.
+
+Run with ``python benchmarks/hdf_layout.py``.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from pandablocks.hdf import FrameProcessor
+from pandablocks.responses import EndData, EndReason, FieldCapture, FrameData, StartData
+
+from fastcs_pandablocks.panda.blocks.hdf_writer import (
+    Compression,
+    DatasetLayout,
+    LayoutHDFWriter,
+)
+
+ROWS = 200_000
+FRAME_ROWS = 10_000
+#: Numbers of captured fields, from a few positions to a full set of encoders.
+WIDTHS = [4, 16, 64]
+
+LAYOUTS = {
+    "default": DatasetLayout(),
+    "chunk 64k": DatasetLayout(chunk_rows=65536),
+    "lzf": DatasetLayout(chunk_rows=65536, compression=Compression.LZF),
+    "lzf+shuffle": DatasetLayout(
+        chunk_rows=65536, compression=Compression.LZF, shuffle=True
+    ),
+    "gzip 1+shuffle": DatasetLayout(
+        chunk_rows=65536,
+        compression=Compression.GZIP,
+        compression_level=1,
+        shuffle=True,
+    ),
+    "gzip 1+shuffle 8k": DatasetLayout(
+        chunk_rows=8192,
+        compression=Compression.GZIP,
+        compression_level=1,
+        shuffle=True,
+    ),
+    "gzip 4+shuffle": DatasetLayout(
+        chunk_rows=65536,
+        compression=Compression.GZIP,
+        compression_level=4,
+        shuffle=True,
+    ),
+    "preallocated": DatasetLayout(chunk_rows=65536, preallocate_rows=ROWS),
+}
+
+
+def start_data(width: int) -> StartData:
+    # A timestamp, then encoder positions captured raw as int32.
+    fields = [
+        FieldCapture("PCAP.TS_TRIG", np.dtype("int64"), "Value", 8e-9, 0.0, "s"),
+        *[
+            FieldCapture(f"INENC{index + 1}.VAL", np.dtype("int32"), "Value", 1, 0, "")
+            for index in range(width - 1)
+        ],
+    ]
+    return StartData(
+        fields=fields,
+        missed=0,
+        process="Raw",
+        format="Framed",
+        sample_bytes=sum(field.type.itemsize for field in fields),
+        arm_time=None,
+        start_time=None,
+        hw_time_offset_ns=None,
+    )
+
+
+def frames(start: StartData) -> list[FrameData]:
+    """Frames of slowly moving encoders, which compress like real captures."""
+
+    rng = np.random.default_rng(seed=0)
+    dtype = np.dtype(
+        [(f"{field.name}.{field.capture}", field.type) for field in start.fields]
+    )
+    data = np.empty(ROWS, dtype)
+    data["PCAP.TS_TRIG.Value"] = np.arange(ROWS) * 1250
+    for name in dtype.names[1:]:  # type: ignore
+        data[name] = np.cumsum(rng.integers(-4, 5, ROWS))
+    return [
+        FrameData(data[row : row + FRAME_ROWS]) for row in range(0, ROWS, FRAME_ROWS)
+    ]
+
+
+def write(filepath: Path, layout: DatasetLayout, start: StartData, data: list) -> float:
+    frame_processor = FrameProcessor()
+    writer = LayoutHDFWriter(iter([str(filepath)]), {}, layout)
+    start_time = time.perf_counter()
+    writer.open_file(frame_processor.create_processors(start))
+    for frame in data:
+        writer.write_frame(frame_processor.scale_data(frame))
+    writer.close_file(EndData(ROWS, EndReason.OK))
+    return time.perf_counter() - start_time
+
+
+def main():
+    # Throughput is of the frames received, ratio is to the size of the default.
+    print(f"{'':<28}{'MB/s':>10}{'size (MB)':>12}{'ratio':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for width in WIDTHS:
+            start = start_data(width)
+            data = frames(start)
+            raw_bytes = sum(frame.data.nbytes for frame in data)
+            default_size = None
+            for name, layout in LAYOUTS.items():
+                filepath = Path(directory) / f"{width}_{name}.h5"
+                write_time = write(filepath, layout, start, data)
+                size = filepath.stat().st_size
+                default_size = default_size or size
+                print(
+                    f"{f'{width} fields {name}':<28}"
+                    f"{raw_bytes / write_time / 1e6:>10.0f}"
+                    f"{size / 1e6:>12.1f}"
+                    f"{default_size / size:>8.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
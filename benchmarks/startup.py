@@ -0,0 +1,170 @@
+"""Time building the controllers of a synthetic design with thousands of fields, and
+compare filtering the initial values of each block and field against indexing them
+with `index_initial_values`.
+
+Run with ``python benchmarks/startup.py``.
+"""
+
+import asyncio
+import time
+import timeit
+from unittest.mock import MagicMock
+
+from pandablocks.responses import (
+    BitMuxFieldInfo,
+    BlockInfo,
+    EnumFieldInfo,
+    FieldInfo,
+    UintFieldInfo,
+)
+
+from fastcs_pandablocks.panda.blocks import Blocks
+from fastcs_pandablocks.panda.blocks.blocks import index_initial_values
+from fastcs_pandablocks.types import PandaName
+
+#: Number of blocks, each with `BLOCK_NUMBER` instances of `FIELDS_PER_KIND` fields
+#: of every kind in `synthetic_field`.
+BLOCKS = [4, 16, 64]
+BLOCK_NUMBER = 4
+FIELDS_PER_KIND = 4
+REPEAT = 3
+
+
+def synthetic_field(kind: int, index: int) -> tuple[str, FieldInfo, dict[str, str]]:
+    """A field of one of a few kinds, and its initial values keyed by suffix."""
+
+    match kind:
+        case 0:
+            return (
+                f"UINT{index}",
+                UintFieldInfo("param", "uint", None, max_val=2**32 - 1),
+                {"": "0"},
+            )
+        case 1:
+            return (f"INT{index}", FieldInfo("param", "int", None), {"": "-1"})
+        case 2:
+            return (
+                f"ENUM{index}",
+                EnumFieldInfo("param", "enum", None, labels=["Off", "On"]),
+                {"": "On"},
+            )
+        case _:
+            return (
+                f"INP{index}",
+                BitMuxFieldInfo("bit_mux", None, None, max_delay=5, labels=["ZERO"]),
+                {"": "ZERO", ".DELAY": "0"},
+            )
+
+
+def synthetic_design(num_blocks: int):
+    blocks, field_infos, initial_values = {}, [], {}
+    block_fields = {}
+    for kind in range(4):
+        for index in range(FIELDS_PER_KIND):
+            name, field_info, values = synthetic_field(kind, index)
+            block_fields[name] = (field_info, values)
+
+    for block_index in range(num_blocks):
+        block_name = "BLOCK" + "".join(
+            chr(ord("A") + block_index // 26**digit % 26) for digit in (1, 0)
+        )
+        blocks[PandaName(block_name)] = BlockInfo(number=BLOCK_NUMBER)
+        field_infos.append(
+            {PandaName(field=name): info for name, (info, _) in block_fields.items()}
+        )
+        for number in range(1, BLOCK_NUMBER + 1):
+            for name, (_, values) in block_fields.items():
+                for suffix, value in values.items():
+                    initial_values[
+                        PandaName.from_string(f"{block_name}{number}.{name}{suffix}")
+                    ] = value
+
+    pcap_fields = {PandaName(field="TRIG_EDGE"): synthetic_field(2, 0)[1]}
+    blocks[PandaName("PCAP")] = BlockInfo(number=1)
+    field_infos.append(pcap_fields)
+    initial_values[PandaName.from_string("PCAP.TRIG_EDGE")] = "On"
+    return blocks, field_infos, {}, initial_values
+
+
+def filter_before(blocks, field_infos, initial_values):
+    """The filtering of initial values done for each block and field before they
+    were indexed."""
+
+    for (block_name, block_info), block_field_infos in zip(
+        blocks.items(), field_infos, strict=True
+    ):
+        for number in range(1, block_info.number + 1):
+            numbered_block_name = block_name + PandaName(block_number=number)
+            block_initial_values = {
+                key: value
+                for key, value in initial_values.items()
+                if key in numbered_block_name
+            }
+            for field_panda_name in block_field_infos:
+                {
+                    key: value
+                    for key, value in block_initial_values.items()
+                    if key in field_panda_name
+                }
+
+
+async def build_controllers(design) -> float:
+    raw_blocks, field_infos, labels, initial_values = design
+    raw_panda = MagicMock()
+
+    async def get_blocks():
+        return raw_blocks
+
+    async def get_initial_values():
+        return labels, initial_values
+
+    async def get_field_infos(blocks):
+        for block, block_field_infos in zip(blocks, field_infos, strict=True):
+            yield block, block_field_infos
+
+    raw_panda.get_blocks = get_blocks
+    raw_panda.get_initial_values = get_initial_values
+    raw_panda.get_field_infos = get_field_infos
+    blocks = Blocks(raw_panda, ios=[])
+    start_time = time.perf_counter()
+    await blocks.parse_introspected_data()
+    return time.perf_counter() - start_time
+
+
+def main():
+    print(
+        f"{'':<14}{'fields':>8}{'before (ms)':>14}{'after (ms)':>14}{'build (ms)':>14}"
+    )
+    for num_blocks in BLOCKS:
+        design = synthetic_design(num_blocks)
+        blocks, field_infos, _, initial_values = design
+        num_fields = sum(
+            len(fields) * block_info.number
+            for block_info, fields in zip(blocks.values(), field_infos, strict=True)
+        )
+
+        before_time = min(
+            timeit.repeat(
+                lambda: filter_before(blocks, field_infos, initial_values),  # noqa: B023
+                number=1,
+                repeat=REPEAT,
+            )
+        )
+        after_time = min(
+            timeit.repeat(
+                lambda: index_initial_values(initial_values),  # noqa: B023
+                number=1,
+                repeat=REPEAT,
+            )
+        )
+
+        build_time = asyncio.run(build_controllers(design))
+        print(
+            f"{f'{num_blocks} blocks':<14}{num_fields:>8}"
+            f"{before_time * 1e3:>14.1f}{after_time * 1e3:>14.1f}"
+            f"{build_time * 1e3:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
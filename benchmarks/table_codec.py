@@ -0,0 +1,116 @@
+"""Compare decoding and encoding sequencer tables with `pandablocks.utils` against
+the vectorised `TableCodec`.
+
+Run with ``python benchmarks/table_codec.py``.
+"""
+
+import timeit
+
+import numpy as np
+from fastcs.datatypes import Table
+from pandablocks.responses import TableFieldDetails, TableFieldInfo
+from pandablocks.utils import table_to_words, words_to_table
+
+from fastcs_pandablocks.panda.table_codec import TableCodec
+from fastcs_pandablocks.panda.utils import (
+    attribute_value_to_panda_value,
+    panda_value_to_attribute_value,
+)
+
+NUMBER = 10
+ROWS = [1024, 4096, 32768]
+
+TRIGGER_LABELS = [
+    "Immediate",
+    "BITA=0",
+    "BITA=1",
+    "BITB=0",
+    "BITB=1",
+    "BITC=0",
+    "BITC=1",
+    "POSA>=POSITION",
+    "POSA<=POSITION",
+    "POSB>=POSITION",
+    "POSB<=POSITION",
+    "POSC>=POSITION",
+    "POSC<=POSITION",
+]
+
+SEQ_TABLE_FIELD_INFO = TableFieldInfo(
+    type="table",
+    subtype=None,
+    description="Sequencer table of lines",
+    max_length=32768,
+    fields={
+        "REPEATS": TableFieldDetails(subtype="uint", bit_low=0, bit_high=15),
+        "TRIGGER": TableFieldDetails(
+            subtype="enum", bit_low=16, bit_high=19, labels=TRIGGER_LABELS
+        ),
+        "POSITION": TableFieldDetails(subtype="int", bit_low=32, bit_high=63),
+        "TIME1": TableFieldDetails(subtype="uint", bit_low=64, bit_high=95),
+        **{
+            f"OUT{output}1": TableFieldDetails(
+                subtype="uint", bit_low=20 + index, bit_high=20 + index
+            )
+            for index, output in enumerate("ABCDEF")
+        },
+        "TIME2": TableFieldDetails(subtype="uint", bit_low=96, bit_high=127),
+        **{
+            f"OUT{output}2": TableFieldDetails(
+                subtype="uint", bit_low=26 + index, bit_high=26 + index
+            )
+            for index, output in enumerate("ABCDEF")
+        },
+    },
+    row_words=4,
+)
+SEQ_STRUCTURED_DTYPE = [
+    (name.lower(), "U16" if details.subtype == "enum" else f"<{details.subtype[0]}4")
+    for name, details in SEQ_TABLE_FIELD_INFO.fields.items()
+]
+
+
+def sequencer_words(rows: int) -> list[str]:
+    rng = np.random.default_rng(seed=0)
+    packed = rng.integers(0, 2**32, size=(rows, 4), dtype=np.uint32)
+    packed[:, 0] &= ~np.uint32(0xF << 16)
+    packed[:, 0] |= rng.integers(0, len(TRIGGER_LABELS), rows, np.uint32) << 16
+    return [str(word) for word in packed.ravel().tolist()]
+
+
+def main():
+    datatype = Table(SEQ_STRUCTURED_DTYPE)
+    codec = TableCodec(SEQ_STRUCTURED_DTYPE, SEQ_TABLE_FIELD_INFO)
+
+    def decode_before(words):
+        return panda_value_to_attribute_value(
+            datatype, words_to_table(words, SEQ_TABLE_FIELD_INFO, True)
+        )
+
+    def encode_before(table):
+        panda_value = attribute_value_to_panda_value(datatype, table)
+        return table_to_words(panda_value, SEQ_TABLE_FIELD_INFO)  # type: ignore
+
+    print(f"{'':<16}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for rows in ROWS:
+        words = sequencer_words(rows)
+        table = codec.decode(words)
+        assert (decode_before(words) == table).all()
+        assert codec.encode(table) == words
+
+        for name, before, after, value in (
+            ("decode", decode_before, codec.decode, words),
+            ("encode", encode_before, codec.encode, table),
+        ):
+            before_time = timeit.timeit(lambda: before(value), number=NUMBER)  # noqa: B023
+            after_time = timeit.timeit(lambda: after(value), number=NUMBER)  # noqa: B023
+            print(
+                f"{f'{name} {rows} rows':<16}"
+                f"{before_time / NUMBER * 1e3:>14.2f}"
+                f"{after_time / NUMBER * 1e3:>14.2f}"
+                f"{before_time / after_time:>9.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
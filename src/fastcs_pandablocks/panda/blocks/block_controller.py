@@ -1,12 +1,18 @@
-from collections.abc import Callable, Coroutine
+from collections.abc import Callable, Coroutine, Iterable
 from typing import Any
 
+import numpy as np
 from fastcs.attributes import Attribute, AttrR
 from fastcs.controllers import Controller, ControllerVector
 from fastcs.datatypes import DataType, String
 
+from fastcs_pandablocks.panda.client_wrapper import TABLE_UPLOAD_CHUNK_ROWS
+from fastcs_pandablocks.panda.io.table import TableFieldIORef
 from fastcs_pandablocks.types import PandaName
 
+#: Sub field of the attribute counting the rows sent by a streamed table upload.
+UPLOADED_ROWS = PandaName(sub_field="UPLOADED_ROWS")
+
 
 class BlockControllerVector(ControllerVector):
     """Vector containing numbered panda blocks."""
@@ -23,10 +29,12 @@ class BlockController(Controller):
         ],
         label: str | None = None,
         ios: list | None = None,
+        upload_table_to_panda: Callable[..., Coroutine[None, None, None]] | None = None,
     ):
         self.description = label
         self.panda_name = panda_name
         self.put_value_to_panda = put_value_to_panda
+        self.upload_table_to_panda = upload_table_to_panda
 
         self.panda_name_to_attribute: dict[PandaName, Attribute] = {}
 
@@ -46,3 +54,37 @@ class BlockController(Controller):
     def add_attribute(self, name: PandaName, attr: Attribute) -> None:
         self.panda_name_to_attribute[name] = attr
         super().add_attribute(name.attribute_name, attr)
+
+    async def upload_table(
+        self,
+        field: str,
+        rows: np.ndarray | Iterable[np.ndarray],
+        chunk_rows: int = TABLE_UPLOAD_CHUNK_ROWS,
+    ):
+        """Stream ``rows`` to the table ``field`` of this block in chunks, so that
+        the whole table never has to be held in memory.
+
+        Progress is published on the table's ``UPLOADED_ROWS`` attribute.
+        """
+
+        table_name = self.panda_name + PandaName(field=field)
+        attribute = self.panda_name_to_attribute[table_name]
+        uploaded_rows = self.panda_name_to_attribute[table_name + UPLOADED_ROWS]
+        assert self.upload_table_to_panda is not None
+        assert isinstance(attribute.io_ref, TableFieldIORef)
+        assert isinstance(uploaded_rows, AttrR)
+        decoder = attribute.io_ref.decoder
+        assert decoder is not None
+
+        # Held so that sends of the table wait for the upload to finish.
+        async with attribute.io_ref.send_lock:
+            # The table is only known again once the panda reports it in *CHANGES.
+            decoder.forget_known_value()
+            await uploaded_rows.update(0)
+            await self.upload_table_to_panda(
+                table_name,
+                rows,
+                decoder.codec.encode,
+                chunk_rows,
+                uploaded_rows.update,
+            )
@@ -1,16 +1,20 @@
 import asyncio
 import enum
-from collections.abc import Generator
+import time
+from collections.abc import AsyncIterator, Awaitable, Generator, Iterable
+from typing import TypeVar
 
 import numpy as np
 from fastcs.attributes import Attribute, AttributeIO, AttrR, AttrRW, AttrW
 from fastcs.controllers import BaseController
 from fastcs.datatypes import Bool, Enum, Float, Int, String, Table
+from fastcs.logging import bind_logger
 from numpy.typing import DTypeLike
-from pandablocks.commands import TableFieldDetails
+from pandablocks.commands import CommandError, TableFieldDetails
 from pandablocks.responses import (
     BitMuxFieldInfo,
     BitOutFieldInfo,
+    BlockInfo,
     EnumFieldInfo,
     ExtOutBitsFieldInfo,
     ExtOutFieldInfo,
@@ -23,26 +27,75 @@ from pandablocks.responses import (
     TimeFieldInfo,
     UintFieldInfo,
 )
-from pandablocks.utils import words_to_table
 
 from fastcs_pandablocks.panda.client_wrapper import RawPanda
+from fastcs_pandablocks.panda.introspection_cache import IntrospectionCache
 from fastcs_pandablocks.panda.io.arm import ArmCommand, ArmIORef
 from fastcs_pandablocks.panda.io.bits import BitGroupOnUpdate
 from fastcs_pandablocks.panda.io.default import DefaultFieldIORef
 from fastcs_pandablocks.panda.io.table import TableFieldIORef
 from fastcs_pandablocks.panda.io.units import TimeUnit, UnitsIORef
-from fastcs_pandablocks.panda.utils import panda_value_to_attribute_value
+from fastcs_pandablocks.panda.table_codec import TableCodec
+from fastcs_pandablocks.panda.utils import (
+    PandaValueDecoder,
+    TableDecoder,
+    make_panda_value_decoder,
+    make_panda_value_encoder,
+)
 from fastcs_pandablocks.types import (
+    InitialValuesIndexType,
     PandaName,
+    RawBlocksType,
+    RawFieldsType,
     RawInitialValuesType,
+    RawLabelsType,
     ResponseType,
     WidgetGroup,
 )
 
-from .block_controller import BlockController, BlockControllerVector
+from .block_controller import UPLOADED_ROWS, BlockController, BlockControllerVector
 from .data import DataController, DatasetAttributes
+from .diagnostics import DiagnosticsController
 from .versions import VersionController
 
+logger = bind_logger(__name__)
+
+T = TypeVar("T")
+
+
+async def _iterate_async(iterable: Iterable[T]) -> AsyncIterator[T]:
+    for item in iterable:
+        yield item
+
+
+def index_initial_values(
+    initial_values: RawInitialValuesType,
+) -> InitialValuesIndexType:
+    """Group ``initial_values`` by block and field in a single pass, so each field
+    can look up the values of itself and its sub-fields directly."""
+
+    index: InitialValuesIndexType = {}
+    for panda_name, value in initial_values.items():
+        block_values = index.setdefault(panda_name.up_to_block(), {})
+        block_values.setdefault(panda_name.field, {})[panda_name] = value
+    return index
+
+
+def _single_value(initial_values: RawInitialValuesType, panda_name: PandaName) -> str:
+    value = initial_values[panda_name]
+    if not isinstance(value, str):
+        raise ValueError(f"Expected a single value for {panda_name}, got {value}")
+    return value
+
+
+def _table_words(
+    initial_values: RawInitialValuesType, panda_name: PandaName
+) -> list[str]:
+    words = initial_values[panda_name]
+    if not isinstance(words, list):
+        raise ValueError(f"Expected a list of words for {panda_name}, got {words}")
+    return words
+
 
 class Blocks:
     """A wrapper that handles creating controllers and attributes from introspected
@@ -52,8 +105,17 @@ class Blocks:
     process so having this all in one (huge) file is the nicest way to handle this.
     """
 
-    def __init__(self, raw_panda: RawPanda, ios: list[AttributeIO]):
+    def __init__(
+        self,
+        raw_panda: RawPanda,
+        ios: list[AttributeIO],
+        introspection_cache: IntrospectionCache | None = None,
+    ):
         self._raw_panda = raw_panda
+        self._introspection_cache = introspection_cache
+
+        #: Checks a layout loaded from `_introspection_cache` against the PandA.
+        self.layout_validation: asyncio.Task | None = None
         #: The controllers which should be registered by `PandaController` and are
         #: acccessible by panda name.
         self._introspected_controllers: dict[PandaName, BlockController] = {}
@@ -69,6 +131,31 @@ class Blocks:
         #: can be updated.
         self._dataset_attributes: dict[PandaName, DatasetAttributes] = {}
 
+        #: Every introspected attribute keyed by its name as sent over the wire
+        #: (e.g. ``"PULSE2.WIDTH.UNITS"``), so that ``*CHANGES`` can be dispatched
+        #: without parsing each name into a `PandaName`.
+        self._raw_name_to_attribute: dict[str, Attribute] = {}
+
+        #: Decoders for the values received for each attribute in
+        #: `_raw_name_to_attribute`, built once at introspection.
+        self._raw_name_to_decoder: dict[str, PandaValueDecoder] = {}
+
+        #: The value of every field read at introspection, keyed by its name as sent
+        #: over the wire like `_raw_name_to_attribute`.
+        self.raw_initial_values: dict[str, str | list[str]] = {}
+
+        #: Timings of the poll loop, recorded by `PandaController`.
+        self.diagnostics = DiagnosticsController()
+
+        #: The ``*IDN`` and blocks the controllers were built from, to check against
+        #: when reconnecting.
+        self._idn: str | None = None
+        self._raw_blocks: RawBlocksType = {}
+
+        #: When each phase of introspection finished, in seconds since it started,
+        #: and the ``"build"`` time spent building controllers.
+        self.introspection_times: dict[str, float] = {}
+
         self._ios = ios
 
     def get_attribute(self, panda_name: PandaName) -> Attribute | None:
@@ -77,6 +164,32 @@ class Blocks:
             return None
         return controller.panda_name_to_attribute.get(panda_name)
 
+    def get_attribute_from_raw_name(self, raw_panda_name: str) -> Attribute | None:
+        return self._raw_name_to_attribute.get(raw_panda_name)
+
+    def get_decoder_from_raw_name(self, raw_panda_name: str) -> PandaValueDecoder:
+        return self._raw_name_to_decoder[raw_panda_name]
+
+    def _index_attribute(self, panda_name: PandaName, attribute: Attribute):
+        raw_panda_name = str(panda_name)
+        self._raw_name_to_attribute[raw_panda_name] = attribute
+
+        io_ref = attribute.io_ref if attribute.has_io_ref() else None
+        table_field_info = (
+            io_ref.field_info if isinstance(io_ref, TableFieldIORef) else None
+        )
+        decoder = make_panda_value_decoder(attribute.datatype, table_field_info)
+        self._raw_name_to_decoder[raw_panda_name] = decoder
+        if isinstance(io_ref, TableFieldIORef):
+            assert isinstance(decoder, TableDecoder) and isinstance(attribute, AttrR)
+            initial_value = attribute.get()
+            decoder.set_known_value(decoder.codec.pack(initial_value), initial_value)
+            io_ref.decoder = decoder
+        elif isinstance(io_ref, DefaultFieldIORef | UnitsIORef):
+            io_ref.encode = make_panda_value_encoder(
+                attribute.datatype, table_field_info
+            )
+
     def controllers(self) -> Generator[tuple[str, BaseController], None, None]:
         for (
             panda_name,
@@ -90,12 +203,29 @@ class Blocks:
     # ====== FOR LINKING AND GENERATING POST INTROSPECTION =============================
     # ==================================================================================
 
+    async def verify_layout(self):
+        """Check the PandA still has the firmware and blocks the controllers were
+        built from, e.g. after reconnecting, raising `RuntimeError` if not."""
+
+        idn_response = await self._raw_panda.get("*IDN")
+        if idn_response != self._idn:
+            raise RuntimeError(
+                f"PandA identity changed from {self._idn!r} to {idn_response!r}, "
+                "restart to introspect it again."
+            )
+        if await self._raw_panda.get_blocks() != self._raw_blocks:
+            raise RuntimeError(
+                "PandA blocks changed since introspection, restart to introspect "
+                "them again."
+            )
+
     async def setup_post_introspection(self):
         await asyncio.gather(
             self._link_bits_groups(),
             self._add_version_block(),
             self._add_pcap_arm(),
             self._add_data_block(),
+            self._add_diagnostics_block(),
         )
 
     async def _link_bits_groups(self):
@@ -121,8 +251,11 @@ class Blocks:
             await update_callback(group_attribute.get())
 
     async def _add_version_block(self):
-        idn_response = await self._raw_panda.get("*IDN")
-        assert isinstance(idn_response, str)
+        if self._idn is None:
+            idn_response = await self._raw_panda.get("*IDN")
+            assert isinstance(idn_response, str)
+            self._idn = idn_response
+        idn_response = self._idn
         self._additional_controllers["Versions"] = VersionController(idn_response)
 
     async def _add_pcap_arm(self):
@@ -131,83 +264,215 @@ class Blocks:
         if pcap_block is None:
             raise ValueError("Did not receive a PCAP block during introspection.")
 
-        pcap_block.add_attribute(
-            pcap_name + PandaName(field="Arm"),
-            AttrRW(
-                Enum(ArmCommand),
-                description="Arm/Disarm the PandA.",
-                io_ref=ArmIORef(self._raw_panda.arm, self._raw_panda.disarm),
-                group=WidgetGroup.CAPTURE.value,
-            ),
+        arm_name = pcap_name + PandaName(field="Arm")
+        arm_attribute = AttrRW(
+            Enum(ArmCommand),
+            description="Arm/Disarm the PandA.",
+            io_ref=ArmIORef(self._raw_panda.arm, self._raw_panda.disarm),
+            group=WidgetGroup.CAPTURE.value,
         )
+        pcap_block.add_attribute(arm_name, arm_attribute)
+        self._index_attribute(arm_name, arm_attribute)
 
     async def _add_data_block(self):
         self._additional_controllers["Data"] = DataController(
             self._raw_panda.data, self._dataset_attributes
         )
 
+    async def _add_diagnostics_block(self):
+        self._additional_controllers["Diagnostics"] = self.diagnostics
+
     # ==================================================================================
     # ====== FOR PARSING INTROSPECTED DATA =============================================
     # ==================================================================================
 
-    async def parse_introspected_data(self):
-        (
-            raw_blocks,
-            raw_field_infos,
-            raw_labels,
-            raw_initial_values,
-        ) = await self._raw_panda.introspect()
-
-        for (block_name, block_info), field_info in zip(
-            raw_blocks.items(), raw_field_infos, strict=True
-        ):
-            numbered_block_names = (
-                [block_name]
-                if block_info.number in (None, 1)
-                else [
-                    block_name + PandaName(block_number=number)
-                    for number in range(1, block_info.number + 1)
-                ]
+    async def _get_design(self) -> str:
+        try:
+            design = await self._raw_panda.get("*METADATA.DESIGN")
+        except CommandError:
+            # Older firmware has no design metadata.
+            return ""
+        assert isinstance(design, str)
+        return design
+
+    async def _get_cached_layout(
+        self, introspection_cache: IntrospectionCache
+    ) -> tuple[RawBlocksType, RawFieldsType]:
+        """Get the layout cached for the PandA's ``*IDN`` and design, validating it
+        in the background, or introspect and cache it if there isn't one."""
+
+        idn_response, design = await asyncio.gather(
+            self._raw_panda.get("*IDN"), self._get_design()
+        )
+        assert isinstance(idn_response, str)
+        self._idn = idn_response
+
+        cached_layout = introspection_cache.load(idn_response, design)
+        if cached_layout is None:
+            layout = await self._raw_panda.get_layout()
+            introspection_cache.save(idn_response, design, *layout)
+            return layout
+
+        logger.info("Using cached introspection", idn=idn_response, design=design)
+        self.layout_validation = asyncio.create_task(
+            self._validate_cached_layout(
+                introspection_cache, idn_response, design, cached_layout
             )
-            numbered_block_controllers: dict[int, BlockController] = {}
-            for number, numbered_block_name in enumerate(numbered_block_names):
-                block_initial_values = {
-                    key: value
-                    for key, value in raw_initial_values.items()
-                    if key in numbered_block_name
-                }
-                label = raw_labels.get(numbered_block_name, None)
-                block = BlockController(
-                    numbered_block_name,
-                    self._raw_panda.put_value_to_panda,
-                    label=block_info.description or label,
-                    ios=self._ios,
-                )
-                numbered_block_controllers[number + 1] = block
-                self.fill_block(block, field_info, block_initial_values)
-                self._introspected_controllers[numbered_block_name] = block
+        )
+        return cached_layout
 
+    async def _validate_cached_layout(
+        self,
+        introspection_cache: IntrospectionCache,
+        idn: str,
+        design: str,
+        cached_layout: tuple[RawBlocksType, RawFieldsType],
+    ):
+        try:
+            layout = await self._raw_panda.get_layout()
+        except Exception:
+            logger.opt(exception=True).warning("Failed to validate cached layout")
+            return
+
+        if layout != cached_layout:
+            logger.error(
+                "PandA layout differs from the cached introspection, the cache has "
+                "been updated, restart to use it",
+                idn=idn,
+                design=design,
+            )
+            introspection_cache.save(idn, design, *layout)
+
+    async def parse_introspected_data(self):
+        """Build a controller for every block of the PandA.
+
+        The initial values, blocks and fields of each block are all requested at
+        once, and each block is built as soon as its fields are received, so that
+        building the controllers overlaps with waiting for the rest of the replies.
+        When each phase finished, and the time spent building controllers, are
+        logged and kept in `introspection_times`.
+        """
+
+        start_time = time.perf_counter()
+
+        async def timed(phase: str, awaitable: Awaitable[T]) -> T:
+            result = await awaitable
+            self.introspection_times[phase] = time.perf_counter() - start_time
+            return result
+
+        initial_values = asyncio.create_task(
+            timed("initial_values", self._raw_panda.get_initial_values())
+        )
+        try:
+            if self._introspection_cache is None:
+                raw_blocks = await timed("blocks", self._raw_panda.get_blocks())
+                block_field_infos = self._raw_panda.get_field_infos(raw_blocks)
+            else:
+                raw_blocks, raw_field_infos = await timed(
+                    "layout", self._get_cached_layout(self._introspection_cache)
+                )
+                block_field_infos = _iterate_async(
+                    zip(raw_blocks, raw_field_infos, strict=True)
+                )
+            raw_labels, raw_initial_values = await initial_values
+        finally:
+            initial_values.cancel()
+        self._raw_blocks = raw_blocks
+        self.raw_initial_values = {
+            str(panda_name): value for panda_name, value in raw_initial_values.items()
+        }
+        initial_values_index = index_initial_values(raw_initial_values)
+
+        block_controllers: dict[PandaName, dict[int, BlockController]] = {}
+        build_time = 0.0
+        async for block_name, field_info in block_field_infos:
+            build_start_time = time.perf_counter()
+            block_controllers[block_name] = self._make_block_controllers(
+                block_name,
+                raw_blocks[block_name],
+                field_info,
+                raw_labels,
+                initial_values_index,
+            )
+            build_time += time.perf_counter() - build_start_time
+        self.introspection_times["field_infos"] = time.perf_counter() - start_time
+
+        # Registered in the order of the blocks, not the order replies arrived.
+        for block_name in raw_blocks:
+            numbered_block_controllers = block_controllers[block_name]
+            for block in numbered_block_controllers.values():
+                self._introspected_controllers[block.panda_name] = block
             # If there are numbered controllers, add a ControllerVector
-            if len(numbered_block_names) > 1:
+            if len(numbered_block_controllers) > 1:
                 self._additional_controllers[str(block_name)] = BlockControllerVector(
                     numbered_block_controllers
                 )
 
+        self.introspection_times["build"] = build_time
+        self.introspection_times["total"] = time.perf_counter() - start_time
+        logger.info(
+            "Introspected PandA",
+            **{
+                f"{phase}_time": round(phase_time, 6)
+                for phase, phase_time in self.introspection_times.items()
+            },
+        )
+
+    def _make_block_controllers(
+        self,
+        block_name: PandaName,
+        block_info: BlockInfo,
+        field_info: dict[PandaName, ResponseType],
+        raw_labels: RawLabelsType,
+        initial_values_index: InitialValuesIndexType,
+    ) -> dict[int, BlockController]:
+        """Build the controllers of every numbered block ``block_name``, keyed by
+        number."""
+
+        numbered_block_names = (
+            [block_name]
+            if block_info.number in (None, 1)
+            else [
+                block_name + PandaName(block_number=number)
+                for number in range(1, block_info.number + 1)
+            ]
+        )
+        numbered_block_controllers: dict[int, BlockController] = {}
+        for number, numbered_block_name in enumerate(numbered_block_names):
+            label = raw_labels.get(numbered_block_name, None)
+            block = BlockController(
+                numbered_block_name,
+                self._raw_panda.put_value_to_panda,
+                label=block_info.description or label,
+                ios=self._ios,
+                upload_table_to_panda=self._raw_panda.upload_table_to_panda,
+            )
+            numbered_block_controllers[number + 1] = block
+            self.fill_block(
+                block,
+                field_info,
+                initial_values_index.get(numbered_block_name, {}),
+            )
+            for panda_name, attribute in block.panda_name_to_attribute.items():
+                self._index_attribute(panda_name, attribute)
+        return numbered_block_controllers
+
     def fill_block(
         self,
         block: BlockController,
         field_infos: dict[PandaName, ResponseType],
-        initial_values: RawInitialValuesType,
+        initial_values: dict[str | None, RawInitialValuesType],
     ):
+        """Add every field of ``field_infos`` to ``block``, with ``initial_values``
+        of the block keyed by field as from `index_initial_values`."""
+
         for field_panda_name, field_info in field_infos.items():
             full_field_name = block.panda_name + field_panda_name
-            field_initial_values = {
-                key: value
-                for key, value in initial_values.items()
-                if key in field_panda_name
-            }
             self.add_field_to_block(
-                block, full_field_name, field_info, field_initial_values
+                block,
+                full_field_name,
+                field_info,
+                initial_values.get(field_panda_name.field, {}),
             )
 
     def add_field_to_block(
@@ -375,13 +640,8 @@ class Blocks:
             for name, details in field_info.fields.items()
         ]
 
-        initial_value = panda_value_to_attribute_value(
-            fastcs_datatype=Table(structured_datatype),
-            value=words_to_table(
-                words=initial_values[panda_name],
-                table_field_info=field_info,
-                convert_enum_indices=True,
-            ),
+        initial_value = TableCodec(structured_datatype, field_info).decode(
+            _table_words(initial_values, panda_name)
         )
 
         # TODO: Add units IO to update the units field and value of this one PV
@@ -389,12 +649,25 @@ class Blocks:
         attribute = AttrRW(
             Table(structured_datatype),
             io_ref=TableFieldIORef(
-                panda_name, field_info, self._raw_panda.put_value_to_panda
+                panda_name,
+                field_info,
+                self._raw_panda.put_value_to_panda,
+                self._raw_panda.append_table_to_panda,
             ),
             initial_value=initial_value,
         )
         parent_block.add_attribute(panda_name, attribute)
 
+        parent_block.add_attribute(
+            panda_name + UPLOADED_ROWS,
+            AttrR(
+                Int(),
+                description="Rows sent by the last streamed upload of the table.",
+                group=WidgetGroup.READBACKS.value,
+                initial_value=0,
+            ),
+        )
+
     def _make_time_param(
         self,
         parent_block: BlockController,
@@ -413,7 +686,7 @@ class Blocks:
             io_ref=DefaultFieldIORef(panda_name, self._raw_panda.put_value_to_panda),
             description=field_info.description,
             group=WidgetGroup.PARAMETERS.value,
-            initial_value=float(initial_values[panda_name]),
+            initial_value=float(_single_value(initial_values, panda_name)),
         )
         parent_block.add_attribute(panda_name, attribute)
 
@@ -441,7 +714,7 @@ class Blocks:
             Float(units="s"),
             description=field_info.description,
             group=WidgetGroup.OUTPUTS.value,
-            initial_value=float(initial_values[panda_name]),
+            initial_value=float(_single_value(initial_values, panda_name)),
         )
         parent_block.add_attribute(panda_name, attribute)
 
@@ -472,7 +745,7 @@ class Blocks:
                 Bool(),
                 description=field_info.description,
                 group=WidgetGroup.OUTPUTS.value,
-                initial_value=bool(int(initial_values[panda_name])),
+                initial_value=bool(int(_single_value(initial_values, panda_name))),
             ),
         )
 
@@ -497,7 +770,7 @@ class Blocks:
             Int(),
             description=field_info.description,
             group=WidgetGroup.OUTPUTS.value,
-            initial_value=int(initial_values[panda_name]),
+            initial_value=int(_single_value(initial_values, panda_name)),
         )
         parent_block.add_attribute(panda_name, pos_out)
 
@@ -508,7 +781,7 @@ class Blocks:
             io_ref=DefaultFieldIORef(
                 scale_panda_name, self._raw_panda.put_value_to_panda
             ),
-            initial_value=float(initial_values[scale_panda_name]),
+            initial_value=float(_single_value(initial_values, scale_panda_name)),
         )
         parent_block.add_attribute(scale_panda_name, scale)
 
@@ -519,7 +792,7 @@ class Blocks:
             io_ref=DefaultFieldIORef(
                 offset_panda_name, self._raw_panda.put_value_to_panda
             ),
-            initial_value=float(initial_values[offset_panda_name]),
+            initial_value=float(_single_value(initial_values, offset_panda_name)),
         )
         parent_block.add_attribute(offset_panda_name, offset)
 
@@ -547,7 +820,9 @@ class Blocks:
             description=field_info.description,
             group=WidgetGroup.CAPTURE.value,
             initial_value=capture_enum.members[
-                capture_enum.names.index(initial_values[capture_panda_name])
+                capture_enum.names.index(
+                    _single_value(initial_values, capture_panda_name)
+                )
             ],
         )
         parent_block.add_attribute(
@@ -590,7 +865,9 @@ class Blocks:
             capture_enum,
             description=field_info.description,
             group=WidgetGroup.CAPTURE.value,
-            initial_value=capture_enum.enum_cls[initial_values[capture_panda_name]],
+            initial_value=capture_enum.enum_cls[
+                _single_value(initial_values, capture_panda_name)
+            ],
         )
 
         parent_block.add_attribute(capture_panda_name, capture_attribute)
@@ -649,7 +926,7 @@ class Blocks:
                     panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.INPUTS.value,
-                initial_value=enum_type[initial_values[panda_name]],
+                initial_value=enum_type[_single_value(initial_values, panda_name)],
             ),
         )
 
@@ -663,7 +940,7 @@ class Blocks:
                     delay_panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.INPUTS.value,
-                initial_value=int(initial_values[delay_panda_name]),
+                initial_value=int(_single_value(initial_values, delay_panda_name)),
             ),
         )
 
@@ -684,7 +961,7 @@ class Blocks:
                     panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.INPUTS.value,
-                initial_value=enum_type[initial_values[panda_name]],
+                initial_value=enum_type[_single_value(initial_values, panda_name)],
             ),
         )
 
@@ -704,7 +981,7 @@ class Blocks:
                     panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.PARAMETERS.value,
-                initial_value=int(initial_values[panda_name]),
+                initial_value=int(_single_value(initial_values, panda_name)),
             ),
         )
 
@@ -721,7 +998,7 @@ class Blocks:
                 Int(min=0, max=uint_read_field_info.max_val),
                 description=uint_read_field_info.description,
                 group=WidgetGroup.READBACKS.value,
-                initial_value=int(initial_values[panda_name]),
+                initial_value=int(_single_value(initial_values, panda_name)),
             ),
         )
 
@@ -759,7 +1036,7 @@ class Blocks:
                     panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.PARAMETERS.value,
-                initial_value=int(initial_values[panda_name]),
+                initial_value=int(_single_value(initial_values, panda_name)),
             ),
         )
 
@@ -776,7 +1053,7 @@ class Blocks:
                 Int(),
                 description=int_read_field_info.description,
                 group=WidgetGroup.READBACKS.value,
-                initial_value=int(initial_values[panda_name]),
+                initial_value=int(_single_value(initial_values, panda_name)),
             ),
         )
 
@@ -814,7 +1091,7 @@ class Blocks:
                     panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.PARAMETERS.value,
-                initial_value=float(initial_values[panda_name]),
+                initial_value=float(_single_value(initial_values, panda_name)),
             ),
         )
 
@@ -831,7 +1108,7 @@ class Blocks:
                 Float(),
                 description=scalar_read_field_info.description,
                 group=WidgetGroup.READBACKS.value,
-                initial_value=float(initial_values[panda_name]),
+                initial_value=float(_single_value(initial_values, panda_name)),
             ),
         )
 
@@ -866,7 +1143,7 @@ class Blocks:
                     panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.PARAMETERS.value,
-                initial_value=bool(int(initial_values[panda_name])),
+                initial_value=bool(int(_single_value(initial_values, panda_name))),
             ),
         )
 
@@ -883,7 +1160,7 @@ class Blocks:
                 Bool(),
                 description=bit_read_field_info.description,
                 group=WidgetGroup.READBACKS.value,
-                initial_value=bool(int(initial_values[panda_name])),
+                initial_value=bool(int(_single_value(initial_values, panda_name))),
             ),
         )
 
@@ -939,7 +1216,7 @@ class Blocks:
                     panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.PARAMETERS.value,
-                initial_value=initial_values[panda_name],
+                initial_value=_single_value(initial_values, panda_name),
             ),
         )
 
@@ -956,7 +1233,7 @@ class Blocks:
                 String(),
                 description=lut_read_field_info.description,
                 group=WidgetGroup.READBACKS.value,
-                initial_value=initial_values[panda_name],
+                initial_value=_single_value(initial_values, panda_name),
             ),
         )
 
@@ -992,7 +1269,7 @@ class Blocks:
                     panda_name, self._raw_panda.put_value_to_panda
                 ),
                 group=WidgetGroup.PARAMETERS.value,
-                initial_value=enum_type[initial_values[panda_name]],
+                initial_value=enum_type[_single_value(initial_values, panda_name)],
             ),
         )
 
@@ -1011,7 +1288,7 @@ class Blocks:
                 Enum(enum_type),
                 description=enum_read_field_info.description,
                 group=WidgetGroup.READBACKS.value,
-                initial_value=enum_type[initial_values[panda_name]],
+                initial_value=enum_type[_single_value(initial_values, panda_name)],
             ),
         )
 
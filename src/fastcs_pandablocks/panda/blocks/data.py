@@ -3,7 +3,6 @@ import enum
 import logging
 import os
 from asyncio import CancelledError
-from collections import deque
 from collections.abc import AsyncGenerator, Callable, Coroutine
 from dataclasses import dataclass
 from importlib.util import find_spec
@@ -18,15 +17,19 @@ from numpy.typing import DTypeLike
 from pandablocks.hdf import (
     EndData,
     FrameData,
+    FrameProcessor,
     Pipeline,
     StartData,
-    create_default_pipeline,
+    create_pipeline,
     stop_pipeline,
 )
 from pandablocks.responses import Data, EndReason, ReadyData
 
 from fastcs_pandablocks.types import PandaName
 
+from .hdf_writer import Compression, DatasetLayout, LayoutHDFWriter
+from .hdf_writer_process import SHARED_RING_BYTES, HDF5WriterProcess
+
 HDFReceived = Union[ReadyData, StartData, FrameData, EndData]
 
 
@@ -64,6 +67,8 @@ class HDF5Buffer:
     number_of_received_rows = 0
     finish_capturing = False
     number_of_rows_in_circular_buffer = 0
+    #: Next row of `circular_buffer` to be written in LAST_N mode.
+    circular_buffer_position = 0
 
     def __init__(
         self,
@@ -74,11 +79,15 @@ class HDF5Buffer:
         number_received_setter: Callable[[Any], Coroutine[Any, Any, None]],
         number_captured_setter_pipeline: NumCapturedSetter,
         dataset_name_cache: dict[str, dict[str, str]],
+        writer_process: HDF5WriterProcess | None = None,
+        dataset_layout: DatasetLayout | None = None,
     ):
         # Only one filename - user must stop capture and set new FileName/FilePath
         # for new files
 
-        self.circular_buffer: deque[FrameData] = deque()
+        #: In LAST_N mode, the last rows received, allocated once the dtype of the
+        #: rows is known from `StartData`.
+        self.circular_buffer: np.ndarray | None = None
         self.capture_mode = capture_mode
 
         match capture_mode:
@@ -98,6 +107,9 @@ class HDF5Buffer:
         self.number_captured_setter_pipeline = number_captured_setter_pipeline
 
         self.dataset_name_cache = dataset_name_cache
+        #: Writes the file in a separate process instead of the default pipeline.
+        self.writer_process = writer_process
+        self.dataset_layout = dataset_layout or DatasetLayout()
 
         if (
             self.capture_mode == CaptureMode.LAST_N
@@ -108,19 +120,36 @@ class HDF5Buffer:
         self.start_pipeline()
 
     def __del__(self):
-        if self.pipeline[0].is_alive():
+        if self.writer_process is None and self.pipeline[0].is_alive():
             stop_pipeline(self.pipeline)
 
-    def put_data_to_file(self, data: HDFReceived):
+    async def put_data_to_file(self, data: HDFReceived):
+        if self.writer_process is not None:
+            # Waits for the writer process to catch up if it's behind.
+            await self.writer_process.put(data)
+            return
         try:
             self.pipeline[0].queue.put_nowait(data)
         except Exception as ex:
             logging.exception(f"Failed to save the data to HDF5 file: {ex}")
 
+    async def close(self):
+        """Wait for the writer process, if any, to finish writing the file."""
+
+        if self.writer_process is not None:
+            await self.writer_process.stop()
+
     def start_pipeline(self):
-        self.pipeline = create_default_pipeline(
-            iter([str(self.filepath)]),
-            self.dataset_name_cache,
+        if self.writer_process is not None:
+            self.writer_process.start()
+            return
+        self.pipeline = create_pipeline(
+            FrameProcessor(),
+            LayoutHDFWriter(
+                iter([str(self.filepath)]),
+                self.dataset_name_cache,
+                self.dataset_layout,
+            ),
             self.number_captured_setter_pipeline,
         )
 
@@ -136,7 +165,7 @@ class HDF5Buffer:
             await self.status_message_setter(
                 "Mismatched StartData packet for file",
             )
-            self.put_data_to_file(
+            await self.put_data_to_file(
                 EndData(self.number_of_received_rows, EndReason.START_DATA_MISMATCH)
             )
 
@@ -152,9 +181,23 @@ class HDF5Buffer:
                 or self.capture_mode == CaptureMode.FOREVER
                 and not self.start_data
             ):
-                self.put_data_to_file(data)
+                await self.put_data_to_file(data)
 
             self.start_data = data
+            if self.capture_mode == CaptureMode.LAST_N and self.circular_buffer is None:
+                self._allocate_circular_buffer(
+                    np.dtype(
+                        [
+                            (f"{field.name}.{field.capture}", field.type)
+                            for field in data.fields
+                        ]
+                    )
+                )
+
+    def _allocate_circular_buffer(self, dtype: np.dtype):
+        self.circular_buffer = np.empty(self.number_of_rows_to_capture, dtype)
+        self.circular_buffer_position = 0
+        self.number_of_rows_in_circular_buffer = 0
 
     async def _capture_first_n(self, data: FrameData):
         """
@@ -174,7 +217,7 @@ class HDF5Buffer:
             ].copy()
             self.number_of_received_rows = self.number_of_rows_to_capture
 
-        self.put_data_to_file(data)
+        await self.put_data_to_file(data)
         await self.number_received_setter(self.number_of_received_rows)
 
         if (
@@ -187,22 +230,27 @@ class HDF5Buffer:
                 "captured, disabling Capture."
             )
             await self.status_message_setter("Requested number of frames captured")
-            self.put_data_to_file(EndData(self.number_of_received_rows, EndReason.OK))
+            await self.put_data_to_file(
+                EndData(self.number_of_received_rows, EndReason.OK)
+            )
             self.finish_capturing = True
 
     async def _capture_forever(self, data: FrameData):
-        self.put_data_to_file(data)
+        await self.put_data_to_file(data)
         self.number_of_received_rows += len(data.data)
         await self.number_received_setter(self.number_of_received_rows)
 
     async def _capture_last_n(self, data: FrameData):
         """
-        Append every FrameData to a buffer until the number of rows equals
-        `:NumCapture`. Then rewrite the data circularly.
+        Copy every FrameData into a buffer of `:NumCapture` rows, allocated once,
+        until it is full. Then overwrite the oldest rows circularly.
 
         Only write the data once PCAP is received.
         """
-        self.circular_buffer.append(data)
+        if self.circular_buffer is None:
+            self._allocate_circular_buffer(data.data.dtype)
+        assert self.circular_buffer is not None
+
         self.number_of_received_rows += len(data.data)
         self.number_of_rows_in_circular_buffer += len(data.data)
 
@@ -210,51 +258,37 @@ class HDF5Buffer:
             await self.status_message_setter(
                 "NumCapture received, rewriting first frames received"
             )
-
+            self.number_of_rows_in_circular_buffer = self.number_of_rows_to_capture
         else:
             await self.status_message_setter("Filling buffer to NumReceived")
 
-        while self.number_of_rows_in_circular_buffer > self.number_of_rows_to_capture:
-            first_frame_data = self.circular_buffer.popleft()
-            first_frame_data_length = len(first_frame_data.data)
-
-            if first_frame_data_length > self.number_of_rows_to_capture:
-                # More data than we want to capture, all in a single FrameData
-                # We can just slice with the NumCapture since this has to be the
-                # only FrameData in the buffer at this point
-                assert len(self.circular_buffer) == 0
-                shrinked_data = first_frame_data.data[
-                    -self.number_of_rows_to_capture :
-                ].copy()
-                first_frame_data.data = shrinked_data
-                self.circular_buffer.appendleft(first_frame_data)
-                self.number_of_rows_in_circular_buffer = self.number_of_rows_to_capture
-            elif (
-                first_frame_data_length
-                > self.number_of_rows_in_circular_buffer
-                - self.number_of_rows_to_capture
-            ):
-                # We can slice from the beginning of the FrameData to have the desired
-                # number of rows
-                indices_to_discard = (
-                    self.number_of_rows_in_circular_buffer
-                    - self.number_of_rows_to_capture
-                )
-                shrinked_data = first_frame_data.data[indices_to_discard:].copy()
-                first_frame_data.data = shrinked_data
-                self.circular_buffer.appendleft(first_frame_data)
-                self.number_of_rows_in_circular_buffer -= indices_to_discard
-                assert (
-                    self.number_of_rows_in_circular_buffer
-                    == self.number_of_rows_to_capture
-                )
-            else:
-                # If we remove the enire first frame data then the buffer will still
-                # be too big, or it will be exactly the number of rows we want
-                self.number_of_rows_in_circular_buffer -= first_frame_data_length
+        # Only the last rows of a frame larger than the buffer would survive.
+        rows = data.data[-self.number_of_rows_to_capture :]
+        start = self.circular_buffer_position
+        end = start + len(rows)
+        if end <= self.number_of_rows_to_capture:
+            self.circular_buffer[start:end] = rows
+        else:
+            wrapped = end - self.number_of_rows_to_capture
+            self.circular_buffer[start:] = rows[: len(rows) - wrapped]
+            self.circular_buffer[:wrapped] = rows[len(rows) - wrapped :]
+        self.circular_buffer_position = end % self.number_of_rows_to_capture
 
         await self.number_received_setter(self.number_of_received_rows)
 
+    def _unroll_circular_buffer(self) -> np.ndarray:
+        """Get the rows of the circular buffer from oldest to newest."""
+
+        assert self.circular_buffer is not None
+        if self.number_of_rows_in_circular_buffer < self.number_of_rows_to_capture:
+            return self.circular_buffer[: self.number_of_rows_in_circular_buffer]
+        return np.concatenate(
+            (
+                self.circular_buffer[self.circular_buffer_position :],
+                self.circular_buffer[: self.circular_buffer_position],
+            )
+        )
+
     async def _handle_end_data(self, data: EndData):
         match self.capture_mode:
             case CaptureMode.LAST_N:
@@ -271,9 +305,11 @@ class HDF5Buffer:
                     "Finishing capture, writing buffered frames to file"
                 )
                 assert self.start_data is not None
-                self.put_data_to_file(self.start_data)
-                for frame_data in self.circular_buffer:
-                    self.put_data_to_file(frame_data)
+                await self.put_data_to_file(self.start_data)
+                if self.number_of_rows_in_circular_buffer:
+                    await self.put_data_to_file(
+                        FrameData(self._unroll_circular_buffer())
+                    )
 
             case CaptureMode.FOREVER:
                 if data.reason != EndReason.MANUALLY_STOPPED:
@@ -290,7 +326,7 @@ class HDF5Buffer:
 
         await self.status_message_setter("Finished capture")
         self.finish_capturing = True
-        self.put_data_to_file(data)
+        await self.put_data_to_file(data)
 
     async def handle_data(self, data: HDFReceived):
         match data:
@@ -432,6 +468,48 @@ class DataController(Controller):
         initial_value=CaptureMode.FIRST_N,
     )
 
+    chunk_rows = AttrRW(
+        Int(min=0),
+        description="Rows in each chunk of the datasets. 0=chosen by h5py",
+        initial_value=0,
+    )
+    compression = AttrRW(
+        Enum(Compression),
+        description="Filter to compress the datasets with",
+        initial_value=Compression.NONE,
+    )
+    compression_level = AttrRW(
+        Int(min=0, max=9),
+        description="Level of GZIP compression, from 0 to 9",
+        initial_value=4,
+    )
+    shuffle = AttrRW(
+        Bool(),
+        description="Shuffle bytes before compressing, to improve the ratio",
+        initial_value=False,
+    )
+    swmr = AttrRW(
+        Bool(),
+        description="Write in SWMR mode, flushed every FlushPeriod, to read live",
+        initial_value=True,
+    )
+    preallocate = AttrRW(
+        Bool(),
+        description="Allocate NumCapture rows of each dataset when the file opens",
+        initial_value=False,
+    )
+
+    writer_process = AttrRW(
+        Bool(),
+        description="Write HDF5 files in a separate process.",
+        initial_value=False,
+    )
+    writer_process_memory = AttrRW(
+        Int(units="MB", min=1),
+        description="Shared memory frames are passed to the writer process through.",
+        initial_value=SHARED_RING_BYTES // 1024**2,
+    )
+
     status = AttrR(
         String(),
         description="Status of HDF5 capture",
@@ -559,6 +637,34 @@ class DataController(Controller):
                 numpy_table
             )
 
+            dataset_names = self._dataset_table_wrapper.hdf_writer_names()
+            flush_period: float = self.flush_period.get()
+            dataset_layout = DatasetLayout(
+                chunk_rows=self.chunk_rows.get(),
+                compression=Compression(self.compression.get()),
+                compression_level=self.compression_level.get(),
+                shuffle=self.shuffle.get(),
+                preallocate_rows=(
+                    num_capture
+                    if self.preallocate.get() and capture_mode != CaptureMode.FOREVER
+                    else 0
+                ),
+                swmr=self.swmr.get(),
+                flush_period=flush_period,
+            )
+            writer_process = (
+                HDF5WriterProcess(
+                    Path(filepath),
+                    dataset_names,
+                    self.num_captured.update,
+                    self.status.update,
+                    self.status.get,
+                    ring_bytes=self.writer_process_memory.get() * 1024**2,
+                    layout=dataset_layout,
+                )
+                if self.writer_process.get()
+                else None
+            )
             buffer = HDF5Buffer(
                 capture_mode,
                 Path(filepath),
@@ -566,9 +672,10 @@ class DataController(Controller):
                 self.status.update,
                 self.num_received.update,
                 number_captured_setter_pipeline,
-                self._dataset_table_wrapper.hdf_writer_names(),
+                dataset_names,
+                writer_process,
+                dataset_layout,
             )
-            flush_period: float = self.flush_period.get()
             async for data in self._client_data(False, flush_period):
                 logging.debug(f"Received data packet: {data}")
 
@@ -582,7 +689,7 @@ class DataController(Controller):
             # Only send EndData if we know the file was opened - could be cancelled
             # before PandA has actually send any data
             if buffer and buffer.capture_mode != CaptureMode.LAST_N:
-                buffer.put_data_to_file(
+                await buffer.put_data_to_file(
                     EndData(buffer.number_of_received_rows, EndReason.MANUALLY_STOPPED)
                 )
 
@@ -598,12 +705,14 @@ class DataController(Controller):
                 and buffer.start_data
                 and buffer.capture_mode != CaptureMode.LAST_N
             ):
-                buffer.put_data_to_file(
+                await buffer.put_data_to_file(
                     EndData(buffer.number_of_received_rows, EndReason.UNKNOWN_EXCEPTION)
                 )
 
         finally:
             logging.debug("Finishing processing HDF5 PandA data")
+            if buffer:
+                await buffer.close()
             await self.num_received.update(
                 buffer.number_of_received_rows if buffer else 0
             )
@@ -0,0 +1,170 @@
+from collections import deque
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+from fastcs.attributes import AttrR
+from fastcs.controllers import Controller
+from fastcs.datatypes import Float, Int, String
+
+from fastcs_pandablocks.panda.command_scheduler import CommandPriority
+from fastcs_pandablocks.types import WidgetGroup
+
+#: Number of polls the rolling timing statistics are calculated over.
+ROLLING_WINDOW = 1000
+
+#: Number of polls between updates of the rolling timing statistics.
+ROLLING_UPDATE_INTERVAL = 10
+
+
+def _timing_attribute(description: str) -> AttrR:
+    return AttrR(
+        Float(units="s", prec=6),
+        description=description,
+        group=WidgetGroup.READBACKS.value,
+    )
+
+
+def _count_attribute(description: str) -> AttrR:
+    return AttrR(Int(), description=description, group=WidgetGroup.READBACKS.value)
+
+
+class DiagnosticsController(Controller):
+    """Timing and health of the loop polling the PandA for changes."""
+
+    get_changes_time = _timing_attribute("Round trip time of the last *CHANGES.")
+    get_changes_time_p50 = _timing_attribute("Median *CHANGES round trip time.")
+    get_changes_time_p99 = _timing_attribute("99th percentile *CHANGES round trip.")
+    get_changes_time_max = _timing_attribute("Longest *CHANGES round trip time.")
+
+    dispatch_time = _timing_attribute("Time to apply the last *CHANGES.")
+    dispatch_time_p50 = _timing_attribute("Median time to apply *CHANGES.")
+    dispatch_time_p99 = _timing_attribute("99th percentile time to apply *CHANGES.")
+    dispatch_time_max = _timing_attribute("Longest time to apply *CHANGES.")
+
+    num_changes = _count_attribute("Number of fields changed in the last poll.")
+    num_failures = _count_attribute("Number of fields which failed to update.")
+    scan_overruns = _count_attribute("Number of polls longer than the poll period.")
+    suppressed_updates = _count_attribute(
+        "Number of received values dropped as they were unchanged."
+    )
+    timed_out_commands = _count_attribute(
+        "Number of commands the PandA didn't reply to in time."
+    )
+    scan_timeouts = _count_attribute("Number of polls which exceeded their budget.")
+    reconnects = _count_attribute("Number of times the PandA was reconnected to.")
+    connection_status = AttrR(
+        String(),
+        description="State of the connection, and why reconnecting last failed.",
+        group=WidgetGroup.READBACKS.value,
+    )
+
+    arm_queue_wait_p99 = _timing_attribute("99th percentile arm queue wait.")
+    arm_queue_wait_max = _timing_attribute("Longest arm queue wait.")
+    put_queue_wait_p99 = _timing_attribute("99th percentile put queue wait.")
+    put_queue_wait_max = _timing_attribute("Longest put queue wait.")
+    poll_queue_wait_p99 = _timing_attribute("99th percentile poll queue wait.")
+    poll_queue_wait_max = _timing_attribute("Longest poll queue wait.")
+    introspection_queue_wait_p99 = _timing_attribute(
+        "99th percentile introspection queue wait."
+    )
+    introspection_queue_wait_max = _timing_attribute(
+        "Longest introspection queue wait."
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.description = "Diagnostics of polling the PandA for changes."
+        self._get_changes_times: deque[float] = deque(maxlen=ROLLING_WINDOW)
+        self._dispatch_times: deque[float] = deque(maxlen=ROLLING_WINDOW)
+        self._num_polls = 0
+        self._queue_wait_times: Mapping[CommandPriority, Sequence[float]] = {}
+        self._queue_wait_attributes = {
+            CommandPriority.ARM: (self.arm_queue_wait_p99, self.arm_queue_wait_max),
+            CommandPriority.PUT: (self.put_queue_wait_p99, self.put_queue_wait_max),
+            CommandPriority.POLL: (
+                self.poll_queue_wait_p99,
+                self.poll_queue_wait_max,
+            ),
+            CommandPriority.INTROSPECTION: (
+                self.introspection_queue_wait_p99,
+                self.introspection_queue_wait_max,
+            ),
+        }
+
+    async def record_poll(
+        self,
+        get_changes_time: float,
+        dispatch_time: float,
+        num_changes: int,
+        num_failures: int,
+        poll_period: float,
+        queue_wait_times: Mapping[CommandPriority, Sequence[float]] | None = None,
+    ):
+        """Publish the timings of a single poll, and the rolling statistics every
+        `ROLLING_UPDATE_INTERVAL` polls.
+
+        ``queue_wait_times`` are the recent times commands of each priority waited
+        to be sent, which are published with the rolling statistics.
+        """
+
+        self._num_polls += 1
+        if queue_wait_times is not None:
+            self._queue_wait_times = queue_wait_times
+        self._get_changes_times.append(get_changes_time)
+        self._dispatch_times.append(dispatch_time)
+
+        await self.get_changes_time.update(get_changes_time)
+        await self.dispatch_time.update(dispatch_time)
+        await self.num_changes.update(num_changes)
+        await self.num_failures.update(num_failures)
+        if get_changes_time + dispatch_time > poll_period:
+            await self.scan_overruns.update(self.scan_overruns.get() + 1)
+
+        if self._num_polls % ROLLING_UPDATE_INTERVAL == 0:
+            await self._update_rolling_statistics()
+
+    async def record_suppressed_updates(self, num_suppressed: int):
+        await self.suppressed_updates.update(
+            self.suppressed_updates.get() + num_suppressed
+        )
+
+    async def record_timeouts(self, timed_out_commands: int, scan_timed_out: bool):
+        """Publish the total number of timed out commands, and count a poll which
+        exceeded its budget if ``scan_timed_out``."""
+
+        if timed_out_commands != self.timed_out_commands.get():
+            await self.timed_out_commands.update(timed_out_commands)
+        if scan_timed_out:
+            await self.scan_timeouts.update(self.scan_timeouts.get() + 1)
+
+    async def record_reconnect(self):
+        await self.reconnects.update(self.reconnects.get() + 1)
+
+    async def record_connection_status(self, status: str):
+        await self.connection_status.update(status)
+
+    async def _update_rolling_statistics(self):
+        for times, p50, p99, maximum in (
+            (
+                self._get_changes_times,
+                self.get_changes_time_p50,
+                self.get_changes_time_p99,
+                self.get_changes_time_max,
+            ),
+            (
+                self._dispatch_times,
+                self.dispatch_time_p50,
+                self.dispatch_time_p99,
+                self.dispatch_time_max,
+            ),
+        ):
+            median, percentile_99 = np.percentile(times, [50, 99])
+            await p50.update(float(median))
+            await p99.update(float(percentile_99))
+            await maximum.update(max(times))
+
+        for priority, times in self._queue_wait_times.items():
+            if times:
+                p99, maximum = self._queue_wait_attributes[priority]
+                await p99.update(float(np.percentile(times, 99)))
+                await maximum.update(max(times))
@@ -0,0 +1,157 @@
+"""
+An `HDFWriter` with configurable chunking, compression and preallocation of the
+datasets it writes, and how often they are flushed.
+"""
+
+import enum
+import logging
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Any
+
+import h5py
+import numpy as np
+from pandablocks.hdf import HDFWriter
+from pandablocks.responses import EndData, FieldCapture, StartData
+
+
+class Compression(enum.Enum):
+    """
+    The filter datasets are compressed with.
+    """
+
+    #: Write uncompressed
+    NONE = 0
+
+    #: Deflate with gzip at the configured level
+    GZIP = 1
+
+    #: Fast compression with a lower ratio than gzip
+    LZF = 2
+
+
+@dataclass(frozen=True)
+class DatasetLayout:
+    """How each captured dataset is stored in the HDF5 file."""
+
+    #: Rows in each chunk, or 0 to let h5py choose.
+    chunk_rows: int = 0
+    compression: Compression = Compression.NONE
+    #: Level of `Compression.GZIP`, from 0 to 9.
+    compression_level: int = 4
+    #: Shuffle the bytes of each chunk before compressing, which usually improves
+    #: the ratio of slowly changing values.
+    shuffle: bool = False
+    #: Rows to allocate each dataset with when the file is opened, or 0 to grow
+    #: them as frames are written. Datasets are trimmed to the rows written, but
+    #: until then SWMR readers see the unwritten rows as zeros.
+    preallocate_rows: int = 0
+    #: Write in single-writer/multiple-reader mode, so the file can be read while
+    #: it is being written.
+    swmr: bool = True
+    #: Seconds between flushes of the datasets in SWMR mode, so readers see the
+    #: frames written. Frames are flushed as they are written if 0.
+    flush_period: float = 0.0
+
+    def create_dataset_kwargs(self) -> dict[str, Any]:
+        """Get the arguments to `h5py.Group.create_dataset` for this layout."""
+
+        match self.compression:
+            case Compression.NONE:
+                compression, compression_opts = None, None
+            case Compression.GZIP:
+                compression, compression_opts = "gzip", self.compression_level
+            case Compression.LZF:
+                compression, compression_opts = "lzf", None
+        return {
+            "chunks": (self.chunk_rows,) if self.chunk_rows > 0 else True,
+            "compression": compression,
+            "compression_opts": compression_opts,
+            "shuffle": self.shuffle,
+        }
+
+
+class LayoutHDFWriter(HDFWriter):
+    """`HDFWriter` which creates its datasets with a `DatasetLayout`."""
+
+    def __init__(
+        self,
+        file_names: Iterator[str],
+        capture_record_hdf_names: dict[str, dict[str, str]],
+        layout: DatasetLayout,
+    ):
+        super().__init__(file_names, capture_record_hdf_names)
+        self.layout = layout
+        self.rows_written = 0
+        self._last_flush_time = float("-inf")
+
+    def create_dataset(self, field: FieldCapture, raw: bool):
+        assert self.hdf_file, "File not open yet"
+        dataset_name = self.capture_record_hdf_names.get(field.name, {}).get(
+            field.capture, f"{field.name}.{field.capture}"
+        )
+        dtype = field.raw_mode_dataset_dtype if raw else field.type
+        return self.hdf_file.create_dataset(
+            f"/{dataset_name}",
+            dtype=dtype,
+            shape=(self.layout.preallocate_rows,),
+            maxshape=(None,),
+            **self.layout.create_dataset_kwargs(),
+        )
+
+    def open_file(self, data: StartData):
+        # As `HDFWriter.open_file`, but only switching to SWMR mode if configured.
+        self.rows_written = 0
+        self._last_flush_time = float("-inf")
+        try:
+            self.file_path = next(self.file_names)
+        except IndexError:
+            logging.exception(
+                "Not enough file names available when opening new HDF5 file"
+            )
+            raise
+        self.hdf_file = h5py.File(self.file_path, "w", libver="latest")
+        raw = data.process == "Raw"
+        self.datasets = [self.create_dataset(field, raw) for field in data.fields]
+        if self.layout.swmr:
+            self.hdf_file.swmr_mode = True
+
+        # Save parameters
+        if data.arm_time is not None:
+            self.hdf_file.attrs["arm_time"] = data.arm_time
+        if data.start_time is not None:
+            self.hdf_file.attrs["start_time"] = data.start_time
+        if data.hw_time_offset_ns is not None:
+            self.hdf_file.attrs["hw_time_offset_ns"] = data.hw_time_offset_ns
+
+        logging.info(
+            f"Opened '{self.file_path}' with {data.sample_bytes} byte samples "
+            f"stored in {len(self.datasets)} datasets, SWMR {self.layout.swmr}"
+        )
+
+    def write_frame(self, data: list[np.ndarray]):
+        if not data:
+            return self.rows_written
+        end = self.rows_written + len(data[0])
+        for dataset, column in zip(self.datasets, data, strict=True):
+            if dataset.shape[0] < end:
+                dataset.resize((end,))
+            dataset[self.rows_written : end] = column
+        self.rows_written = end
+
+        # Without SWMR nothing can read the file until it is closed, which flushes.
+        now = time.monotonic()
+        if self.layout.swmr and now - self._last_flush_time >= self.layout.flush_period:
+            for dataset in self.datasets:
+                dataset.flush()
+            self._last_flush_time = now
+        return self.rows_written
+
+    def close_file(self, data: EndData):
+        # Trim any preallocated rows which weren't written.
+        if self.hdf_file is not None:
+            for dataset in self.datasets:
+                if dataset.shape[0] != self.rows_written:
+                    dataset.resize((self.rows_written,))
+        super().close_file(data)
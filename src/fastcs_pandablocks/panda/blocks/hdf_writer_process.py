@@ -0,0 +1,246 @@
+"""
+Writing HDF5 files in a separate process, so that scaling, compressing and writing
+frames doesn't hold the GIL of the process polling the PandA.
+
+Frames are copied into a ring of shared memory and the writer process is told where
+to find them, writing them straight from the shared memory.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from pandablocks.hdf import FrameProcessor
+from pandablocks.responses import Data, EndData, FrameData, StartData
+
+from .hdf_writer import DatasetLayout, LayoutHDFWriter
+
+#: Default bytes of shared memory frames are handed to the writer process through.
+SHARED_RING_BYTES = 64 * 1024**2
+
+#: Seconds between checks for space in the ring while the writer process catches up.
+BACK_PRESSURE_POLL_PERIOD = 0.01
+
+#: Seconds to wait for the writer process to finish writing when stopped.
+STOP_TIMEOUT = 30.0
+
+
+@dataclass(frozen=True)
+class _FrameHandoff:
+    """Rows of a frame in the ring, from byte ``start`` counting every byte ever
+    written to the ring, so the position in the ring is ``start % capacity``."""
+
+    start: int
+    rows: int
+    dtype: np.dtype
+
+    @property
+    def end(self) -> int:
+        return self.start + self.rows * self.dtype.itemsize
+
+
+@dataclass(frozen=True)
+class _WriterError:
+    message: str
+
+
+def _run_writer(
+    shared_memory_name: str,
+    released: Any,
+    requests: multiprocessing.Queue,
+    replies: multiprocessing.Queue,
+    filepath: str,
+    dataset_names: dict[str, dict[str, str]],
+    layout: DatasetLayout,
+):
+    """Entry point of the writer process, writing each request until `None`.
+
+    ``released`` is set to the end of each frame once it has been written, freeing
+    its space in the ring. The number of rows written so far, or a `_WriterError`,
+    is replied after each request.
+    """
+
+    shared_memory = SharedMemory(shared_memory_name)
+    capacity = shared_memory.size
+    # Handlers of the default pipeline, called in turn rather than in threads.
+    frame_processor = FrameProcessor()
+    writer = LayoutHDFWriter(iter([filepath]), dataset_names, layout)
+    failed = False
+    try:
+        while (request := requests.get()) is not None:
+            try:
+                match request:
+                    case StartData() if not failed:
+                        writer.open_file(frame_processor.create_processors(request))
+                    case _FrameHandoff() if not failed:
+                        rows = np.ndarray(
+                            request.rows,
+                            request.dtype,
+                            buffer=shared_memory.buf,
+                            offset=request.start % capacity,
+                        )
+                        replies.put(
+                            writer.write_frame(
+                                frame_processor.scale_data(FrameData(rows))
+                            )
+                        )
+                        del rows
+                    case EndData() if not failed:
+                        writer.close_file(request)
+            except Exception as e:
+                logging.exception("HDF5 writer process failed to write")
+                replies.put(_WriterError(f"{type(e).__name__}: {e}"))
+                # Later frames are still released, but not written.
+                failed = True
+            if isinstance(request, _FrameHandoff):
+                released.value = request.end
+    finally:
+        if writer.hdf_file is not None:
+            writer.hdf_file.close()
+        shared_memory.close()
+        replies.put(None)
+
+
+class HDF5WriterProcess:
+    """Writes one HDF5 file in a separate process.
+
+    Each frame is copied into a ring of ``ring_bytes`` of shared memory, waiting
+    for the writer process to free space if it is behind. The rows written and any
+    errors are passed to ``number_captured_setter`` and ``status_message_setter``.
+    While waiting, the status says so, and the status from ``status_message_getter``
+    before the wait is restored after it.
+    """
+
+    def __init__(
+        self,
+        filepath: Path,
+        dataset_names: dict[str, dict[str, str]],
+        number_captured_setter: Callable[[Any], Coroutine[Any, Any, None]],
+        status_message_setter: Callable[[Any], Coroutine[Any, Any, None]],
+        status_message_getter: Callable[[], Any],
+        ring_bytes: int = SHARED_RING_BYTES,
+        layout: DatasetLayout | None = None,
+    ):
+        self._filepath = filepath
+        self._dataset_names = dataset_names
+        self._number_captured_setter = number_captured_setter
+        self._status_message_setter = status_message_setter
+        self._status_message_getter = status_message_getter
+        self._ring_bytes = ring_bytes
+        self._layout = layout or DatasetLayout()
+        self._written = 0
+        self._replies_task: asyncio.Task | None = None
+
+    def start(self):
+        # Spawned, as forking a process running an event loop and threads isn't safe.
+        context = multiprocessing.get_context("spawn")
+        self._shared_memory = SharedMemory(create=True, size=self._ring_bytes)
+        self._capacity = self._shared_memory.size
+        self._released = context.Value("Q", 0)
+        self._requests: multiprocessing.Queue = context.Queue()
+        self._replies: multiprocessing.Queue = context.Queue()
+        self._process = context.Process(
+            target=_run_writer,
+            args=(
+                self._shared_memory.name,
+                self._released,
+                self._requests,
+                self._replies,
+                str(self._filepath),
+                self._dataset_names,
+                self._layout,
+            ),
+            name="HDF5WriterProcess",
+            daemon=True,
+        )
+        self._process.start()
+        self._replies_task = asyncio.create_task(self._handle_replies())
+
+    async def _handle_replies(self):
+        loop = asyncio.get_running_loop()
+        while (
+            reply := await loop.run_in_executor(None, self._replies.get)
+        ) is not None:
+            if isinstance(reply, _WriterError):
+                logging.error(f"HDF5 writer process failed: {reply.message}")
+                await self._status_message_setter(
+                    f"HDF5 writer process failed: {reply.message}"
+                )
+            else:
+                await self._number_captured_setter(reply)
+
+    def _reserve(self, nbytes: int) -> int | None:
+        """Reserve ``nbytes`` of contiguous space in the ring, returning its start or
+        `None` if the writer process hasn't freed enough yet."""
+
+        position = self._written % self._capacity
+        # Frames don't wrap, so skip the end of the ring if there isn't room.
+        padding = self._capacity - position if position + nbytes > self._capacity else 0
+        if self._written + padding + nbytes - self._released.value > self._capacity:
+            return None
+        start = self._written + padding
+        self._written = start + nbytes
+        return start
+
+    async def _put_rows(self, rows: np.ndarray):
+        status_before_waiting = None
+        while (start := self._reserve(rows.nbytes)) is None:
+            if not self._process.is_alive():
+                raise RuntimeError("HDF5 writer process exited unexpectedly")
+            if status_before_waiting is None:
+                status_before_waiting = self._status_message_getter()
+                await self._status_message_setter("Waiting for HDF5 writer process")
+            await asyncio.sleep(BACK_PRESSURE_POLL_PERIOD)
+        if status_before_waiting is not None:
+            await self._status_message_setter(status_before_waiting)
+
+        offset = start % self._capacity
+        np.ndarray(
+            rows.shape, rows.dtype, buffer=self._shared_memory.buf, offset=offset
+        )[:] = rows
+        self._requests.put(_FrameHandoff(start, len(rows), rows.dtype))
+
+    async def put(self, data: Data):
+        """Hand ``data`` to the writer process, waiting for space for frames."""
+
+        if not isinstance(data, FrameData):
+            self._requests.put(data)
+            return
+
+        # Frames larger than half the ring are split so they always fit.
+        max_rows = self._capacity // 2 // data.data.dtype.itemsize
+        if max_rows < 1:
+            raise ValueError(
+                f"Shared memory of {self._capacity} bytes is too small for rows "
+                f"of {data.data.dtype.itemsize} bytes."
+            )
+        for start_row in range(0, len(data.data), max_rows):
+            await self._put_rows(data.data[start_row : start_row + max_rows])
+
+    async def stop(self):
+        """Wait for the writer process to write everything handed to it and exit,
+        then free the shared memory."""
+
+        if self._replies_task is None:
+            return  # Never started.
+
+        if self._process.is_alive():
+            self._requests.put(None)
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._process.join, STOP_TIMEOUT
+            )
+            if self._process.is_alive():
+                logging.error("HDF5 writer process didn't stop, terminating it")
+                self._process.terminate()
+        if self._process.exitcode != 0:
+            # It may have exited without replying that it was done.
+            self._replies.put(None)
+        await self._replies_task
+        self._shared_memory.close()
+        self._shared_memory.unlink()
@@ -3,16 +3,29 @@ This method has a `RawPanda` which handles all the io with the client.
 """
 
 import asyncio
-from collections.abc import AsyncGenerator
+from collections import deque
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Iterable,
+)
+from dataclasses import dataclass, field
 from pprint import pformat
+from typing import Any, TypeVar
 
+import numpy as np
 from fastcs.datatypes import DataType
 from fastcs.logging import bind_logger
 from pandablocks.asyncio import AsyncioClient
 from pandablocks.commands import (
     Arm,
     ChangeGroup,
+    Command,
     Disarm,
+    Exchange,
+    ExchangeGenerator,
     Get,
     GetBlockInfo,
     GetChanges,
@@ -21,27 +34,193 @@ from pandablocks.commands import (
 )
 from pandablocks.responses import Data
 
+from fastcs_pandablocks.panda.command_scheduler import (
+    MAX_COMMANDS_IN_FLIGHT,
+    CommandPriority,
+    CommandScheduler,
+)
+from fastcs_pandablocks.panda.table_codec import chunk_table_rows
 from fastcs_pandablocks.types import (
     PandaName,
     RawBlocksType,
     RawFieldsType,
     RawInitialValuesType,
+    RawLabelsType,
+    ResponseType,
 )
 
 logger = bind_logger(__name__)
 
+T = TypeVar("T")
+
+#: Default seconds to wait for the PandA to reply to each command.
+COMMAND_TIMEOUT = 5.0
+
+#: Default number of rows sent in each command of a streamed table upload.
+TABLE_UPLOAD_CHUNK_ROWS = 1024
+
+
+def _format_for_log(value: Any) -> str:
+    return "\n    " + pformat(value, indent=4).replace("\n", "\n    ")
+
+
+@dataclass
+class AppendTable(Command[None]):
+    """Append rows to a table field, using the server's ``<<`` syntax.
+
+    Args:
+        field: The table field to append to
+        words: The packed words of the rows to append
+
+    For example::
+
+        AppendTable("SEQ1.TABLE", ["1048576", "0", "1000", "1000"])
+    """
+
+    field: str
+    words: list[str]
+
+    def execute(self, version: tuple[int, int]) -> ExchangeGenerator[None]:
+        ex = Exchange([f"{self.field}<<"] + self.words + [""])
+        yield ex
+        ex.check_ok()
+
+
+@dataclass
+class _PendingPut:
+    value: str | list[str]
+    #: One for each write of the field coalesced into this put.
+    futures: list[asyncio.Future[None]] = field(default_factory=list)
+
+
+def _fail_pending_puts(pending_puts: Iterable[_PendingPut]):
+    # Not cancelled, as that would look like the tasks awaiting them were.
+    for pending_put in pending_puts:
+        for future in pending_put.futures:
+            if not future.done():
+                future.set_exception(
+                    ConnectionError("Disconnected from PandA before the put was sent")
+                )
+
 
 class RawPanda:
-    """A wrapper for interacting with pandablocks-client."""
+    """A wrapper for interacting with pandablocks-client.
+
+    Payloads are only formatted for logging if debug logging is enabled, and only
+    every ``changes_log_interval``-th ``*CHANGES`` reply is logged.
+
+    Puts are queued rather than each waiting for its own round trip. Every put
+    queued while the previous batch is in flight is sent in the next batch, all
+    at once on the connection, and repeated writes to the same field in a batch
+    are coalesced so only the last value is sent.
+
+    Commands are sent through a `CommandScheduler`, so that arms and puts go ahead
+    of polls and introspection waiting to be sent, with at most
+    ``max_commands_in_flight`` of those on each connection at once.
+
+    If ``poll_connection`` is set, polls of ``*CHANGES`` are sent on a second
+    connection to the PandA so they don't wait for, or hold up, anything else. The
+    PandA tracks changes per connection, so the first poll on it reports every
+    field, including those unchanged since `get_initial_values`.
+
+    Every command raises `TimeoutError` if the PandA hasn't replied within
+    ``command_timeout`` seconds, counted in `timed_out_commands`.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        changes_log_interval: int = 1,
+        poll_connection: bool = False,
+        command_timeout: float = COMMAND_TIMEOUT,
+        max_commands_in_flight: int = MAX_COMMANDS_IN_FLIGHT,
+    ):
+        if changes_log_interval < 1:
+            raise ValueError(
+                f"changes_log_interval must be at least 1, got {changes_log_interval}"
+            )
+        self._hostname = hostname
+        self._poll_connection = poll_connection
+        self._create_clients()
+        self._command_timeout = command_timeout
+        #: Number of commands the PandA didn't reply to in time.
+        self.timed_out_commands = 0
+        self._changes_log_interval = changes_log_interval
+        self._changes_received = 0
+        self._pending_puts: dict[str, _PendingPut] = {}
+        self._put_sender: asyncio.Task | None = None
+        self._command_scheduler = CommandScheduler(max_commands_in_flight)
+        self._poll_command_scheduler = (
+            CommandScheduler(max_commands_in_flight)
+            if poll_connection
+            else self._command_scheduler
+        )
+
+    def _create_clients(self):
+        self._client = AsyncioClient(host=self._hostname)
+        self._poll_client = (
+            AsyncioClient(host=self._hostname)
+            if self._poll_connection
+            else self._client
+        )
+
+    def _cancel_pending_puts(self):
+        if self._put_sender is not None:
+            self._put_sender.cancel()
+        _fail_pending_puts(self._pending_puts.values())
+        self._pending_puts.clear()
+
+    @property
+    def queue_wait_times(self) -> dict[CommandPriority, deque[float]]:
+        """Recent times commands of each priority waited to be sent."""
+        return {
+            **self._command_scheduler.queue_wait_times,
+            CommandPriority.POLL: self._poll_command_scheduler.queue_wait_times[
+                CommandPriority.POLL
+            ],
+        }
 
-    def __init__(self, hostname: str):
-        self._client = AsyncioClient(host=hostname)
+    async def _send(self, command: Command[T], priority: CommandPriority) -> T:
+        if priority is CommandPriority.POLL:
+            client, command_scheduler = self._poll_client, self._poll_command_scheduler
+        else:
+            client, command_scheduler = self._client, self._command_scheduler
+        async with command_scheduler.slot(priority):
+            try:
+                return await client.send(command, timeout=self._command_timeout)
+            except TimeoutError:
+                self.timed_out_commands += 1
+                logger.error(
+                    "COMMAND TIMED OUT",
+                    command=command,
+                    timeout=self._command_timeout,
+                )
+                raise
 
     async def connect(self):
         await self._client.connect()
+        if self._poll_client is not self._client:
+            await self._poll_client.connect()
 
     async def disconnect(self):
+        self._cancel_pending_puts()
         await self._client.close()
+        if self._poll_client is not self._client:
+            await self._poll_client.close()
+
+    async def reconnect(self):
+        """Replace the connections to the PandA with new ones, e.g. after a network
+        outage. Any puts waiting to be sent, or in flight, fail with
+        `ConnectionError`."""
+
+        self._cancel_pending_puts()
+        for client in {self._client, self._poll_client}:
+            try:
+                await client.close()
+            except Exception:
+                logger.opt(exception=True).debug("Failed to close old connection")
+        self._create_clients()
+        await self.connect()
 
     async def put_value_to_panda(
         self,
@@ -51,34 +230,108 @@ class RawPanda:
     ) -> None:
         await self.send(str(panda_name), value)
 
-    async def introspect(
+    async def append_table_to_panda(self, panda_name: PandaName, words: list[str]):
+        logger.opt(lazy=True).debug(
+            "APPENDING TO PANDA",
+            name=lambda: str(panda_name),
+            value=lambda: _format_for_log(words),
+        )
+        await self._send(AppendTable(str(panda_name), words), CommandPriority.PUT)
+
+    async def upload_table_to_panda(
         self,
-    ) -> tuple[
-        RawBlocksType, RawFieldsType, RawInitialValuesType, RawInitialValuesType
-    ]:
-        blocks, fields, labels, initial_values = {}, [], {}, {}
+        panda_name: PandaName,
+        rows: np.ndarray | Iterable[np.ndarray],
+        encode: Callable[[np.ndarray], list[str]],
+        chunk_rows: int = TABLE_UPLOAD_CHUNK_ROWS,
+        on_progress: Callable[[int], Coroutine[None, None, None]] | None = None,
+    ):
+        """Stream ``rows`` to a table field, ``chunk_rows`` rows at a time.
+
+        The first chunk replaces the table and the rest are appended, each being
+        encoded only when it is sent. As every chunk is its own command, other
+        commands such as polls aren't stuck behind the whole upload.
+        ``on_progress`` is called with the number of rows sent after each chunk.
+        """
+
+        rows_sent = 0
+        for chunk in chunk_table_rows(rows, chunk_rows):
+            words = encode(chunk)
+            if rows_sent == 0:
+                await self.send(str(panda_name), words)
+            else:
+                await self.append_table_to_panda(panda_name, words)
+            rows_sent += len(chunk)
+            if on_progress is not None:
+                await on_progress(rows_sent)
+
+        if rows_sent == 0:
+            await self.send(str(panda_name), [])
 
-        raw_blocks = await self._client.send(GetBlockInfo())
-        blocks = {
+    async def get_blocks(self) -> RawBlocksType:
+        raw_blocks = await self._send(GetBlockInfo(), CommandPriority.INTROSPECTION)
+        return {
             PandaName.from_string(name): block_info
             for name, block_info in raw_blocks.items()
         }
-        formatted_blocks = pformat(blocks, indent=4).replace("\n", "\n    ")
-        logger.debug(f"BLOCKS RECEIVED:\n    {formatted_blocks}")
 
-        raw_fields = await asyncio.gather(
-            *[self._client.send(GetFieldInfo(str(block))) for block in blocks]
+    async def _get_block_field_infos(
+        self, block: PandaName
+    ) -> tuple[PandaName, dict[PandaName, ResponseType]]:
+        block_values = await self._send(
+            GetFieldInfo(str(block)), CommandPriority.INTROSPECTION
         )
-        fields = [
-            {
-                PandaName(field=name): field_info
-                for name, field_info in block_values.items()
-            }
-            for block_values in raw_fields
+        return block, {
+            PandaName(field=name): field_info
+            for name, field_info in block_values.items()
+        }
+
+    def get_field_infos(
+        self, blocks: Iterable[PandaName]
+    ) -> AsyncIterator[tuple[PandaName, dict[PandaName, ResponseType]]]:
+        """Request the fields of every block at once, iterating over the fields of
+        each block as its reply arrives."""
+
+        tasks = [
+            asyncio.create_task(self._get_block_field_infos(block)) for block in blocks
         ]
+
+        async def as_received():
+            try:
+                for next_received in asyncio.as_completed(tasks):
+                    yield await next_received
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return as_received()
+
+    async def get_layout(self) -> tuple[RawBlocksType, RawFieldsType]:
+        """Get the blocks of the PandA and the fields of each block."""
+
+        blocks = await self.get_blocks()
+        logger.opt(lazy=True).debug(
+            "BLOCKS RECEIVED", blocks=lambda: _format_for_log(blocks)
+        )
+
+        block_fields = {
+            block: field_infos
+            async for block, field_infos in self.get_field_infos(blocks)
+        }
+        fields = [block_fields[block] for block in blocks]
         logger.debug("FIELDS RECEIVED (TOO VERBOSE TO LOG)")
 
-        field_data = await self.get_changes()
+        return blocks, fields
+
+    async def get_initial_values(
+        self,
+    ) -> tuple[RawLabelsType, RawInitialValuesType]:
+        """Get the labels of the blocks, and the value of every field."""
+
+        labels: RawLabelsType = {}
+        initial_values: RawInitialValuesType = {}
+
+        field_data = await self.get_changes(priority=CommandPriority.INTROSPECTION)
 
         for field_name, value in field_data.items():
             if field_name.startswith("*METADATA"):
@@ -91,6 +344,9 @@ class RawPanda:
                         field_name=field_name,
                         value=value,
                     )
+                if not isinstance(value, str):
+                    logger.warning("Ignoring multiline metadata", field_name=field_name)
+                    continue
                 labels[
                     PandaName.from_string(
                         field_name_without_prefix.removeprefix("LABEL_")
@@ -99,42 +355,97 @@ class RawPanda:
             else:  # Field is a default value
                 initial_values[PandaName.from_string(field_name)] = value
 
-        formatted_initial_values = pformat(initial_values, indent=4).replace(
-            "\n", "\n    "
+        logger.opt(lazy=True).debug(
+            "INITIAL VALUES RECEIVED",
+            initial_values=lambda: _format_for_log(initial_values),
+        )
+        logger.opt(lazy=True).debug(
+            "LABELS RECEIVED", labels=lambda: _format_for_log(labels)
         )
-        logger.debug(f"INITIAL VALUES:\n    {formatted_initial_values}")
-        formatted_labels = pformat(labels, indent=4).replace("\n", "\n    ")
-        logger.debug(f"LABELS:\n    {formatted_labels}")
 
-        return blocks, fields, labels, initial_values
+        return labels, initial_values
 
     async def send(self, name: str, value: str | list[str]):
-        logger.debug(f"SENDING TO PANDA:\n    {name} = {pformat(value, indent=4)}")
-        await self._client.send(Put(name, value))
+        logger.opt(lazy=True).debug(
+            "SENDING TO PANDA",
+            name=lambda: name,
+            value=lambda: _format_for_log(value),
+        )
+
+        future = asyncio.get_running_loop().create_future()
+        pending_put = self._pending_puts.get(name)
+        if pending_put is None:
+            self._pending_puts[name] = pending_put = _PendingPut(value)
+        else:
+            logger.debug("COALESCING PUT", name=name)
+            pending_put.value = value
+        pending_put.futures.append(future)
+
+        if self._put_sender is None or self._put_sender.done():
+            self._put_sender = asyncio.create_task(self._send_pending_puts())
+        await future
+
+    async def _send_pending_puts(self):
+        while self._pending_puts:
+            pending_puts, self._pending_puts = self._pending_puts, {}
+            try:
+                results = await asyncio.gather(
+                    *(
+                        self._send(Put(name, pending_put.value), CommandPriority.PUT)
+                        for name, pending_put in pending_puts.items()
+                    ),
+                    return_exceptions=True,
+                )
+            except asyncio.CancelledError:
+                # Disconnected with this batch in flight, so it will get no replies.
+                _fail_pending_puts(pending_puts.values())
+                raise
+            for pending_put, result in zip(pending_puts.values(), results, strict=True):
+                for future in pending_put.futures:
+                    if future.done():
+                        continue
+                    if isinstance(result, BaseException):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(None)
 
     async def get(self, name: str) -> str | list[str]:
-        received = await self._client.send(Get(name))
-        formatted_received = pformat(received, indent=4).replace("\n", "\n    ")
-        logger.debug(f"RECEIVED FROM PANDA:\n    {name} = {formatted_received}")
+        received = await self._send(Get(name), CommandPriority.PUT)
+        logger.opt(lazy=True).debug(
+            "RECEIVED FROM PANDA",
+            name=lambda: name,
+            value=lambda: _format_for_log(received),
+        )
         return received
 
-    async def get_changes(self) -> dict[str, str | list[str]]:
-        changes = await self._client.send(GetChanges(ChangeGroup.ALL, True))
+    async def get_changes(
+        self,
+        group: ChangeGroup = ChangeGroup.ALL,
+        priority: CommandPriority = CommandPriority.POLL,
+    ) -> dict[str, str | list[str]]:
+        changes = await self._send(GetChanges(group, True), priority)
         single_and_multiline_changes = {
             **changes.values,
             **changes.multiline_values,
         }
-        formatted_received = pformat(single_and_multiline_changes, indent=4).replace(
-            "\n", "\n    "
-        )
-        logger.debug(f"RECEIVED CHANGES:\n    {formatted_received}")
+        self._changes_received += 1
+        if self._changes_received % self._changes_log_interval == 0:
+            logger.opt(lazy=True).debug(
+                "RECEIVED CHANGES",
+                changes=lambda: _format_for_log(single_and_multiline_changes),
+            )
         return single_and_multiline_changes
 
+    async def reset_changes(self):
+        """Have the next poll of ``*CHANGES`` report every field, rather than only
+        those changed since the last poll."""
+        await self._send(Put("*CHANGES", ""), CommandPriority.POLL)
+
     async def arm(self):
-        await self._client.send(Arm())
+        await self._send(Arm(), CommandPriority.ARM)
 
     async def disarm(self):
-        await self._client.send(Disarm())
+        await self._send(Disarm(), CommandPriority.ARM)
 
     async def data(
         self, scaled: bool, flush_period: float
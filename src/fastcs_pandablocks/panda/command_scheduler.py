@@ -0,0 +1,95 @@
+"""
+Priority scheduling of the commands sent on the control connection to the PandA.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+#: Polls and introspection commands which can be on the connection at once, before
+#: the rest wait their turn.
+MAX_COMMANDS_IN_FLIGHT = 16
+
+#: Number of commands of each priority the queue wait times are kept for.
+QUEUE_WAIT_WINDOW = 1000
+
+
+class CommandPriority(IntEnum):
+    """Priority classes of commands, the lowest value going first."""
+
+    #: ``*PCAP.ARM=`` and ``*PCAP.DISARM=``.
+    ARM = 0
+    #: Puts and gets on behalf of clients.
+    PUT = 1
+    #: Polls of ``*CHANGES``.
+    POLL = 2
+    #: Fetching the blocks, fields and initial values at startup.
+    INTROSPECTION = 3
+
+
+#: Priorities which are sent straight away, without counting towards the limit.
+UNLIMITED_PRIORITIES = frozenset({CommandPriority.ARM, CommandPriority.PUT})
+
+
+class CommandScheduler:
+    """Limits the polls and introspection commands in flight on a connection,
+    choosing which command goes next by its `CommandPriority` and then in the order
+    they arrived.
+
+    The PandA answers commands in the order they are sent, so the limit bounds how
+    much lower priority work an arm can be stuck behind. Arms and puts are in
+    `UNLIMITED_PRIORITIES`, so are sent straight away. The time each command
+    waited for its turn is kept in `queue_wait_times`.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_COMMANDS_IN_FLIGHT):
+        self._max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._waiting: list[tuple[CommandPriority, int, asyncio.Future[None]]] = []
+        self._arrival_order = itertools.count()
+        self.queue_wait_times: dict[CommandPriority, deque[float]] = {
+            priority: deque(maxlen=QUEUE_WAIT_WINDOW) for priority in CommandPriority
+        }
+
+    @asynccontextmanager
+    async def slot(self, priority: CommandPriority) -> AsyncGenerator[None, None]:
+        """Wait for a command of ``priority`` to be allowed on the connection,
+        holding its place until the context exits."""
+
+        queued_at = time.perf_counter()
+        limited = priority not in UNLIMITED_PRIORITIES
+        if not limited:
+            pass
+        elif self._in_flight < self._max_in_flight and not self._waiting:
+            self._in_flight += 1
+        else:
+            turn = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiting, (priority, next(self._arrival_order), turn))
+            try:
+                await turn
+            except asyncio.CancelledError:
+                # Pass the turn on if it arrived as we were cancelled.
+                if turn.done() and not turn.cancelled():
+                    self._release()
+                raise
+        self.queue_wait_times[priority].append(time.perf_counter() - queued_at)
+
+        try:
+            yield
+        finally:
+            if limited:
+                self._release()
+
+    def _release(self):
+        while self._waiting:
+            _, _, turn = heapq.heappop(self._waiting)
+            if not turn.done():
+                # The slot is handed straight on, so stays in flight.
+                turn.set_result(None)
+                return
+        self._in_flight -= 1
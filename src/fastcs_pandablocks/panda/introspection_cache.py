@@ -0,0 +1,132 @@
+"""
+Caching the blocks and fields introspected from a PandA on disk, so that startup
+doesn't have to wait for them to be fetched again.
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Any, get_args
+
+from fastcs.logging import bind_logger
+from pandablocks.responses import BlockInfo, TableFieldDetails
+
+from fastcs_pandablocks.types import (
+    PandaName,
+    RawBlocksType,
+    RawFieldsType,
+    ResponseType,
+)
+
+logger = bind_logger(__name__)
+
+#: Incremented whenever the layout of cache files changes, to ignore older ones.
+CACHE_FORMAT_VERSION = 1
+
+_CACHED_CLASSES: dict[str, type] = {
+    cls.__name__: cls for cls in (BlockInfo, TableFieldDetails, *get_args(ResponseType))
+}
+
+
+def _to_json(value: Any) -> Any:
+    if is_dataclass(value) and not isinstance(value, type):
+        return {
+            "__class__": type(value).__name__,
+            **{
+                dataclass_field.name: _to_json(getattr(value, dataclass_field.name))
+                for dataclass_field in fields(value)
+            },
+        }
+    if isinstance(value, dict):
+        return {str(key): _to_json(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _from_json(value: dict[str, Any]) -> Any:
+    class_name = value.pop("__class__", None)
+    if class_name is None:
+        return value
+    return _CACHED_CLASSES[class_name](**value)
+
+
+class IntrospectionCache:
+    """Blocks and fields of PandAs, stored as a JSON file in ``directory`` for each
+    ``*IDN`` and ``*METADATA.DESIGN``.
+
+    The firmware determines which blocks and fields exist, and the design which
+    of them are in use, so a cached layout is only valid for the same pair.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def path(self, idn: str, design: str) -> Path:
+        key = hashlib.sha256(f"{idn}\0{design}".encode()).hexdigest()[:16]
+        return self.directory / f"{key}.json"
+
+    def load(self, idn: str, design: str) -> tuple[RawBlocksType, RawFieldsType] | None:
+        """Get the blocks and fields cached for ``idn`` and ``design``, or `None` if
+        there aren't any or they can't be read."""
+
+        path = self.path(idn, design)
+        try:
+            with path.open() as file:
+                cached = json.load(file, object_hook=_from_json)
+            if (
+                cached["version"] != CACHE_FORMAT_VERSION
+                or cached["idn"] != idn
+                or cached["design"] != design
+            ):
+                return None
+            blocks = {
+                PandaName.from_string(name): block_info
+                for name, block_info in cached["blocks"].items()
+            }
+            field_infos = [
+                {
+                    PandaName(field=name): field_info
+                    for name, field_info in block.items()
+                }
+                for block in cached["fields"]
+            ]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.opt(exception=True).warning(
+                "Ignoring unreadable introspection cache", path=str(path)
+            )
+            return None
+        return blocks, field_infos
+
+    def save(
+        self,
+        idn: str,
+        design: str,
+        blocks: RawBlocksType,
+        field_infos: RawFieldsType,
+    ):
+        """Cache the blocks and fields for ``idn`` and ``design``, logging rather than
+        raising if they can't be written."""
+
+        path = self.path(idn, design)
+        cached = {
+            "version": CACHE_FORMAT_VERSION,
+            "idn": idn,
+            "design": design,
+            "blocks": _to_json(blocks),
+            "fields": _to_json(field_infos),
+        }
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Written alongside then renamed, so a partial file is never read.
+            temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+            temporary_path.write_text(json.dumps(cached))
+            os.replace(temporary_path, path)
+        except OSError:
+            logger.opt(exception=True).warning(
+                "Failed to write introspection cache", path=str(path)
+            )
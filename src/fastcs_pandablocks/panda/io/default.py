@@ -1,16 +1,16 @@
-from collections.abc import Callable, Coroutine
 from dataclasses import dataclass
-from typing import Any
 
 from fastcs.attributes import (
-    AttributeIO,
     AttributeIORef,
     AttrW,
 )
-from fastcs.datatypes import DataType, DType_T
+from fastcs.datatypes import DType_T
 
 from fastcs_pandablocks.panda.utils import (
-    attribute_value_to_panda_value,
+    OnSendIO,
+    PandaValueEncoder,
+    PutValueToPanda,
+    put_encoded_value,
 )
 from fastcs_pandablocks.types import PandaName
 
@@ -18,19 +18,22 @@ from fastcs_pandablocks.types import PandaName
 @dataclass
 class DefaultFieldIORef(AttributeIORef):
     panda_name: PandaName
-    put_value_to_panda: Callable[
-        [PandaName, DataType, Any], Coroutine[None, None, None]
-    ]
+    put_value_to_panda: PutValueToPanda
+    #: Set by `Blocks` once the attribute is introspected.
+    encode: PandaValueEncoder | None = None
 
 
-class DefaultFieldIO(AttributeIO[DType_T, DefaultFieldIORef]):
+class DefaultFieldIO(OnSendIO[DType_T, DefaultFieldIORef]):
     """Default IO for sending and updating introspected attributes."""
 
     async def send(
         self, attr: AttrW[DType_T, DefaultFieldIORef], value: DType_T
     ) -> None:
-        await attr.io_ref.put_value_to_panda(
+        await put_encoded_value(
+            attr,
+            value,
             attr.io_ref.panda_name,
-            attr.datatype,
-            attribute_value_to_panda_value(attr.datatype, value),
+            attr.io_ref.encode,
+            attr.io_ref.put_value_to_panda,
+            self._on_send,
         )
@@ -1,38 +1,140 @@
+import asyncio
 from collections.abc import Callable, Coroutine
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
 
+import numpy as np
 from fastcs.attributes import (
-    AttributeIO,
     AttributeIORef,
     AttrW,
 )
-from fastcs.datatypes import DataType, DType_T
+from fastcs.datatypes import DType_T
+from fastcs.logging import bind_logger
 from pandablocks.responses import TableFieldInfo
 from pandablocks.utils import table_to_words
 
 from fastcs_pandablocks.panda.utils import (
+    OnSendCallback,
+    OnSendIO,
+    PutValueToPanda,
+    TableDecoder,
     attribute_value_to_panda_value,
+    put_encoded_value,
 )
 from fastcs_pandablocks.types import PandaName
 
+logger = bind_logger(__name__)
+
 
 @dataclass
 class TableFieldIORef(AttributeIORef):
     panda_name: PandaName
     field_info: TableFieldInfo
-    put_value_to_panda: Callable[
-        [PandaName, DataType, Any], Coroutine[None, None, None]
-    ]
+    put_value_to_panda: PutValueToPanda
+    append_table_to_panda: Callable[[PandaName, list[str]], Coroutine[None, None, None]]
+    #: Set by `Blocks` once the attribute is introspected.
+    decoder: TableDecoder | None = None
+    #: Held while a value is sent, so each send is worked out from the last.
+    send_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class TableFieldIO(OnSendIO[DType_T, TableFieldIORef]):
+    """An IO for updating Table valued attributes.
 
+    Once the last known value of the table is available from its `TableDecoder`,
+    tables identical to it aren't sent, and tables which only add rows to the end
+    of it are appended rather than sent whole. Sends to the same table are made
+    one at a time, each compared with the table the last one left.
 
-class TableFieldIO(AttributeIO[DType_T, TableFieldIORef]):
-    """An IO for updating Table valued attributes."""
+    As another client may have written the table since it was last polled,
+    ``poll_tables`` is called to bring the known tables up to date first. Without
+    it, or if it fails, tables are always sent whole.
+    """
+
+    def __init__(
+        self,
+        on_send: OnSendCallback | None = None,
+        poll_tables: Callable[[], Coroutine[None, None, None]] | None = None,
+    ):
+        self._poll_tables = poll_tables
+        super().__init__(on_send)
 
     async def send(self, attr: AttrW[DType_T, TableFieldIORef], value: DType_T) -> None:
-        attr_value = attribute_value_to_panda_value(attr.datatype, value)
-        assert isinstance(attr_value, dict)
-        panda_words = table_to_words(attr_value, attr.io_ref.field_info)
-        await attr.io_ref.put_value_to_panda(
-            attr.io_ref.panda_name, attr.datatype, panda_words
-        )
+        io_ref = attr.io_ref
+        if io_ref.decoder is None:
+            await put_encoded_value(
+                attr,
+                value,
+                io_ref.panda_name,
+                self._encode_without_decoder(attr),
+                io_ref.put_value_to_panda,
+                self._on_send,
+            )
+            return
+
+        assert isinstance(value, np.ndarray)
+        # Sends overlapping would each be worked out from the same known table.
+        async with io_ref.send_lock:
+            packed = io_ref.decoder.codec.pack(value)
+            known_packed = (
+                io_ref.decoder.packed if await self._known_tables_polled() else None
+            )
+            if known_packed is not None and np.array_equal(packed, known_packed):
+                logger.debug(
+                    "Table unchanged, not sending", name=str(io_ref.panda_name)
+                )
+                return
+            panda_value = await self._send_difference(attr, packed, known_packed)
+            io_ref.decoder.set_known_value(packed, value)
+            if self._on_send is not None:
+                await self._on_send(io_ref.panda_name, attr, value, panda_value)
+
+    async def _known_tables_polled(self) -> bool:
+        if self._poll_tables is None:
+            return False
+        try:
+            await self._poll_tables()
+        except Exception:
+            logger.opt(exception=True).warning(
+                "Failed to poll tables, sending table whole"
+            )
+            return False
+        return True
+
+    @staticmethod
+    def _encode_without_decoder(
+        attr: AttrW[DType_T, TableFieldIORef],
+    ) -> Callable[[DType_T], list[str]]:
+        def encode(value: DType_T) -> list[str]:
+            attr_value = attribute_value_to_panda_value(attr.datatype, value)
+            assert isinstance(attr_value, dict)
+            return table_to_words(attr_value, attr.io_ref.field_info)
+
+        return encode
+
+    async def _send_difference(
+        self,
+        attr: AttrW[DType_T, TableFieldIORef],
+        packed: np.ndarray,
+        known_packed: np.ndarray | None,
+    ) -> list[str] | None:
+        """Send the rows which were added to the last known table, or the whole
+        table if it was otherwise changed, returning the words of the whole table
+        if they were sent."""
+
+        io_ref = attr.io_ref
+        assert io_ref.decoder is not None
+        codec = io_ref.decoder.codec
+
+        if (
+            known_packed is not None
+            and len(known_packed) < len(packed)
+            and np.array_equal(packed[: len(known_packed)], known_packed)
+        ):
+            await io_ref.append_table_to_panda(
+                io_ref.panda_name, codec.packed_to_words(packed[len(known_packed) :])
+            )
+            return None
+
+        words = codec.packed_to_words(packed)
+        await io_ref.put_value_to_panda(io_ref.panda_name, attr.datatype, words)
+        return words
@@ -1,18 +1,18 @@
 import enum
-from collections.abc import Callable, Coroutine
 from dataclasses import dataclass
-from typing import Any
 
 from fastcs.attributes import (
-    AttributeIO,
     AttributeIORef,
     AttrRW,
     AttrW,
 )
-from fastcs.datatypes import DataType, Float
+from fastcs.datatypes import Float
 
 from fastcs_pandablocks.panda.utils import (
-    attribute_value_to_panda_value,
+    OnSendIO,
+    PandaValueEncoder,
+    PutValueToPanda,
+    put_encoded_value,
 )
 from fastcs_pandablocks.types import PandaName
 
@@ -31,19 +31,22 @@ class UnitsIORef(AttributeIORef):
     attribute_to_scale: AttrRW
     current_scale: TimeUnit
     panda_name: PandaName
-    put_value_to_panda: Callable[
-        [PandaName, DataType, Any], Coroutine[None, None, None]
-    ]
+    put_value_to_panda: PutValueToPanda
+    #: Set by `Blocks` once the attribute is introspected.
+    encode: PandaValueEncoder | None = None
 
 
-class UnitsIO(AttributeIO[enum.Enum, UnitsIORef]):
+class UnitsIO(OnSendIO[enum.Enum, UnitsIORef]):
     """A sender for arming and disarming the Pcap."""
 
     async def send(self, attr: AttrW[enum.Enum, UnitsIORef], value: enum.Enum):
-        await attr.io_ref.put_value_to_panda(
+        await put_encoded_value(
+            attr,
+            value,
             attr.io_ref.panda_name,
-            attr.datatype,
-            attribute_value_to_panda_value(attr.datatype, value),
+            attr.io_ref.encode,
+            attr.io_ref.put_value_to_panda,
+            self._on_send,
         )
 
         attr.io_ref.attribute_to_scale.update_datatype(Float(units=value.name, prec=5))
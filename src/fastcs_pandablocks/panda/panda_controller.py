@@ -1,47 +1,150 @@
 import asyncio
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any
 
-from fastcs.attributes import Attribute, AttrR
+from fastcs.attributes import AttrR, AttrRW, AttrW
 from fastcs.controllers import Controller
-from fastcs.datatypes import Table
+from fastcs.datatypes import Float
 from fastcs.logging import bind_logger
 from fastcs.methods import scan
-from pandablocks.utils import words_to_table
+from pandablocks.commands import ChangeGroup, CommandError
 
 from fastcs_pandablocks.panda.blocks import Blocks
-from fastcs_pandablocks.panda.client_wrapper import RawPanda
+from fastcs_pandablocks.panda.client_wrapper import COMMAND_TIMEOUT, RawPanda
+from fastcs_pandablocks.panda.command_scheduler import MAX_COMMANDS_IN_FLIGHT
+from fastcs_pandablocks.panda.introspection_cache import IntrospectionCache
 from fastcs_pandablocks.panda.io.arm import ArmIO
 from fastcs_pandablocks.panda.io.default import DefaultFieldIO
-from fastcs_pandablocks.panda.io.table import TableFieldIO, TableFieldIORef
+from fastcs_pandablocks.panda.io.table import TableFieldIO
 from fastcs_pandablocks.panda.io.units import UnitsIO
-from fastcs_pandablocks.panda.utils import panda_value_to_attribute_value
+from fastcs_pandablocks.panda.scheduler import (
+    ChangeGroupScheduler,
+    parse_change_group_poll_periods,
+)
 from fastcs_pandablocks.types import PandaName
 
 logger = bind_logger(__name__)
 
+#: Period of the scan which polls for changes, poll periods of each change
+#: group are rounded to a multiple of this.
+POLL_TICK = 0.05
+
+#: Factor the poll period is multiplied by after each ``*CHANGES`` with no changes.
+POLL_BACKOFF_FACTOR = 2.0
+
+#: Default seconds a single poll for changes may take.
+SCAN_CYCLE_BUDGET = 10.0
+
+#: Number of polls in a row exceeding their budget before reconnecting.
+RECONNECT_AFTER_SCAN_TIMEOUTS = 3
+
+#: Seconds between attempts to reconnect to the PandA.
+RECONNECT_PERIOD = 1.0
+
 
 @dataclass
 class PandaControllerSettings:
     address: str
+    #: Period in seconds between ``*CHANGES`` requests.
+    poll_period: float = 0.1
+    #: Poll periods for individual change groups, overriding ``poll_period``.
+    #: Keyed by `ChangeGroup` name, e.g. ``{"POSN": 0.05, "TABLE": 1.0}``.
+    change_group_poll_periods: dict[str, float] = field(default_factory=dict)
+    #: If greater than ``poll_period``, polling backs off exponentially up to this
+    #: period while nothing on the PandA changes.
+    max_poll_period: float | None = None
+    #: Only log every Nth ``*CHANGES`` reply when debug logging is enabled.
+    changes_log_interval: int = 1
+    #: Poll ``*CHANGES`` on a second connection to the PandA, so that polls and
+    #: writes don't wait for each other. Leave unset to use a single connection.
+    poll_connection: bool = False
+    #: Seconds to wait for the PandA to reply to each command.
+    command_timeout: float = COMMAND_TIMEOUT
+    #: Polls and introspection commands which can be waiting for a reply on each
+    #: connection at once. Arms and puts are never held back by this.
+    max_commands_in_flight: int = MAX_COMMANDS_IN_FLIGHT
+    #: Seconds a single poll for changes may take before it is abandoned, and the
+    #: next poll resyncs every field.
+    scan_cycle_budget: float = SCAN_CYCLE_BUDGET
+    #: Directory to cache the introspected blocks and fields of each firmware and
+    #: design in, so later startups can skip fetching them. Leave unset to always
+    #: introspect the PandA.
+    introspection_cache_dir: Path | None = None
 
 
 class PandaController(Controller):
     """Controller for polling data from the panda through pandablocks-client.
 
-    Changes are received at a given poll period and passed to sub-controllers.
+    Changes are polled for each change group at its configured period and passed to
+    sub-controllers.
     """
 
     def __init__(self, settings: PandaControllerSettings) -> None:
         # TODO https://github.com/DiamondLightSource/FastCS/issues/62
 
-        self._raw_panda = RawPanda(settings.address)
-        self._ios = [ArmIO(), DefaultFieldIO(), TableFieldIO(), UnitsIO()]
-        self._blocks: Blocks = Blocks(self._raw_panda, ios=self._ios)
+        self._raw_panda = RawPanda(
+            settings.address,
+            changes_log_interval=settings.changes_log_interval,
+            poll_connection=settings.poll_connection,
+            command_timeout=settings.command_timeout,
+            max_commands_in_flight=settings.max_commands_in_flight,
+        )
+        self._scan_cycle_budget = settings.scan_cycle_budget
+        #: Set when changes may have been lost, so every field should be fetched.
+        self._resync_needed = False
+        #: Set when the connection to the PandA is lost.
+        self._reconnect_needed = False
+        self._next_reconnect_time = float("-inf")
+        self._consecutive_scan_timeouts = 0
+        self._base_poll_period = settings.poll_period
+        self._change_group_scheduler = ChangeGroupScheduler(
+            parse_change_group_poll_periods(
+                settings.poll_period, settings.change_group_poll_periods
+            ),
+            POLL_TICK,
+        )
+        self._ios = [
+            ArmIO(),
+            DefaultFieldIO(on_send=self._on_send),
+            TableFieldIO(on_send=self._on_send, poll_tables=self._poll_tables),
+            UnitsIO(on_send=self._on_send),
+        ]
+        self._blocks: Blocks = Blocks(
+            self._raw_panda,
+            ios=self._ios,
+            introspection_cache=(
+                None
+                if settings.introspection_cache_dir is None
+                else IntrospectionCache(settings.introspection_cache_dir)
+            ),
+        )
         self.connected = False
 
+        #: The last raw value received for, or sent to, each field, starting from
+        #: those read at introspection, so that repeated values and the echoes of
+        #: values sent can be dropped before decoding.
+        self._last_raw_values: dict[str, str | list[str]] = {}
+
         super().__init__(ios=self._ios)
 
+        self.poll_period = AttrR(
+            Float(units="s"),
+            description="Current period between polls for changes.",
+            initial_value=settings.poll_period,
+        )
+        self.min_poll_period = AttrRW(
+            Float(units="s"),
+            description="Period to poll for changes at while the PandA is active.",
+            initial_value=settings.poll_period,
+        )
+        self.max_poll_period = AttrRW(
+            Float(units="s"),
+            description="Period polling for changes backs off to while idle.",
+            initial_value=settings.max_poll_period or settings.poll_period,
+        )
+
     async def connect(self) -> None:
         if self.connected:
             # `connect` needs to be called in `initialise`,
@@ -49,7 +152,10 @@ class PandaController(Controller):
             return
         await self._raw_panda.connect()
         await self._blocks.parse_introspected_data()
+        # Attributes start at these values, so only differences need applying.
+        self._last_raw_values = dict(self._blocks.raw_initial_values)
         await self._blocks.setup_post_introspection()
+        await self._blocks.diagnostics.record_connection_status("Connected")
         self.connected = True
 
     async def initialise(self) -> None:
@@ -64,75 +170,276 @@ class PandaController(Controller):
                 self.add_sub_controller(block_name.lower(), block)
                 await block.initialise()
 
-    async def update_field_value(self, panda_name: PandaName, value: str | list[str]):
-        """Update a panda field with either a single value or a list of words."""
+    async def update_field_value(
+        self, raw_panda_name: str, value: str | list[str]
+    ) -> None:
+        """Update a panda field with either a single value or a list of words.
 
-        attribute = self._blocks.get_attribute(panda_name)
+        ``raw_panda_name`` is the field name exactly as received in ``*CHANGES``.
+        """
+
+        attribute = self._blocks.get_attribute_from_raw_name(raw_panda_name)
         if attribute is None:
             logger.opt(exception=True).error(
-                f"Couldn't find panda field for {panda_name}."
+                f"Couldn't find panda field for {raw_panda_name}."
             )
             return
         assert isinstance(attribute, AttrR)
 
+        decode = self._blocks.get_decoder_from_raw_name(raw_panda_name)
         try:
-            attribute_value = self._coerce_value_to_panda_type(attribute, value)
+            attribute_value = decode(value)
         except ValueError:
             logger.opt(exception=True).error("Coerce failed")
             return
 
         await self.update_attribute(attribute, attribute_value)
 
-    def _coerce_value_to_panda_type(
-        self, attribute: Attribute, value: str | list[str]
-    ) -> Any:
-        """Convert a provided value into an attribute_value for this panda attribute."""
-        match value:
-            case list() as words:
-                if not isinstance(attribute.datatype, Table):
-                    raise ValueError(f"{attribute} is not a Table attribute")
-                io_ref = attribute.io_ref
-                if not isinstance(io_ref, TableFieldIORef):
-                    raise ValueError(
-                        f"AttributeIORef for {attribute} is not TableFieldIORef"
-                    )
-                table_values = words_to_table(
-                    words, io_ref.field_info, convert_enum_indices=True
-                )
-                return panda_value_to_attribute_value(attribute.datatype, table_values)
-            case _:
-                return panda_value_to_attribute_value(attribute.datatype, value)
+    async def apply_changes(
+        self, changes: dict[str, str | list[str]]
+    ) -> dict[str, Exception]:
+        """Apply every value of a ``*CHANGES`` reply in a single pass.
+
+        Fields are updated one after another rather than as a task each, since most
+        updates complete without ever suspending. Any exceptions are returned keyed by
+        the field that raised them, so that one bad field doesn't stop the rest.
+        ``*METADATA`` values, such as block labels, aren't attributes so are skipped.
+        """
+
+        failures: dict[str, Exception] = {}
+        for raw_panda_name, value in changes.items():
+            if raw_panda_name.startswith("*METADATA"):
+                continue
+            try:
+                await self.update_field_value(raw_panda_name, value)
+            except Exception as e:
+                failures[raw_panda_name] = e
+        return failures
 
     async def update_attribute(self, attribute: AttrR, attribute_value: Any) -> None:
         """Dispatch setting logic based on attribute type."""
         value = attribute.datatype.validate(attribute_value)
         await attribute.update(value)
 
-    @scan(0.1)
+    async def get_changes(
+        self, change_groups: list[ChangeGroup]
+    ) -> dict[str, str | list[str]]:
+        if len(change_groups) == 1:
+            return await self._raw_panda.get_changes(change_groups[0])
+
+        changes = {}
+        for group_changes in await asyncio.gather(
+            *[self._raw_panda.get_changes(group) for group in change_groups]
+        ):
+            changes.update(group_changes)
+        return changes
+
+    async def _drop_unchanged_values(
+        self, changes: dict[str, str | list[str]]
+    ) -> dict[str, str | list[str]]:
+        """Remove any values which are the same as when that field was last seen."""
+
+        new_changes = {
+            raw_panda_name: value
+            for raw_panda_name, value in changes.items()
+            if self._last_raw_values.get(raw_panda_name) != value
+        }
+        self._last_raw_values.update(new_changes)
+
+        if len(new_changes) != len(changes):
+            await self._blocks.diagnostics.record_suppressed_updates(
+                len(changes) - len(new_changes)
+            )
+        return new_changes
+
+    async def _on_send(
+        self,
+        panda_name: PandaName,
+        attribute: AttrW,
+        value: Any,
+        panda_value: str | list[str] | None,
+    ):
+        """Called after a value is sent to the panda.
+
+        Polling is reset to its fastest period. If the whole raw value was sent, it
+        is published as the readback straight away and recorded as the last value
+        seen, so that its echo in the next ``*CHANGES`` is dropped. If the panda
+        reports a different value, that is still applied. If only part of it was
+        sent, the next value reported is always applied.
+        """
+
+        await self._reset_poll_period()
+        if panda_value is None:
+            self._last_raw_values.pop(str(panda_name), None)
+        elif isinstance(attribute, AttrR):
+            self._last_raw_values[str(panda_name)] = panda_value
+            await self.update_attribute(attribute, value)
+
+    async def _poll_tables(self):
+        """Apply any changes to tables, e.g. so a table being sent is compared with
+        its value on the panda rather than when it was last polled."""
+
+        await self._poll_changes([ChangeGroup.TABLE])
+
+    async def _set_poll_period(self, poll_period: float):
+        poll_period = max(
+            min(poll_period, self.max_poll_period.get()), self.min_poll_period.get()
+        )
+        if poll_period != self.poll_period.get():
+            self._change_group_scheduler.set_period_scale(
+                poll_period / self._base_poll_period
+            )
+            await self.poll_period.update(poll_period)
+
+    async def _reset_poll_period(self):
+        await self._set_poll_period(self.min_poll_period.get())
+
+    async def _back_off_poll_period(self):
+        await self._set_poll_period(self.poll_period.get() * POLL_BACKOFF_FACTOR)
+
+    async def _poll_changes(
+        self, change_groups: list[ChangeGroup]
+    ) -> tuple[dict[str, str | list[str]], dict[str, Exception], float, float]:
+        """Get and apply the changes of ``change_groups``, returning the changes
+        applied, any failures, and the time taken to get and to apply them."""
+
+        if self._resync_needed:
+            await self._raw_panda.reset_changes()
+            self._last_raw_values.clear()
+            self._resync_needed = False
+
+        start_time = time.perf_counter()
+        changes = await self._drop_unchanged_values(
+            await self.get_changes(change_groups)
+        )
+        received_time = time.perf_counter()
+        failures = await self.apply_changes(changes)
+        for raw_panda_name, exc in failures.items():
+            logger.opt(exception=exc).error(f"Failed to update field {raw_panda_name}")
+        dispatched_time = time.perf_counter()
+
+        return (
+            changes,
+            failures,
+            received_time - start_time,
+            dispatched_time - received_time,
+        )
+
+    async def reconnect(self):
+        """Reconnect to the PandA, check it is the one the controllers were built
+        from, then bring every attribute up to date from one full ``*CHANGES``.
+
+        A new connection reports every field in its first ``*CHANGES``, and only
+        those which differ from the last values seen are applied.
+        """
+
+        await self._raw_panda.reconnect()
+        await self._blocks.verify_layout()
+
+        if self._resync_needed:
+            self._last_raw_values.clear()
+            self._resync_needed = False
+        changes = await self._drop_unchanged_values(await self._raw_panda.get_changes())
+        failures = await self.apply_changes(changes)
+        for raw_panda_name, exc in failures.items():
+            logger.opt(exception=exc).error(f"Failed to update field {raw_panda_name}")
+
+        await self._blocks.diagnostics.record_reconnect()
+        logger.info("Reconnected to the PandA", num_changes=len(changes))
+
+    async def _try_reconnect(self):
+        now = time.monotonic()
+        if now < self._next_reconnect_time:
+            return
+        self._next_reconnect_time = now + RECONNECT_PERIOD
+
+        try:
+            async with asyncio.timeout(self._scan_cycle_budget):
+                await self.reconnect()
+        except (OSError, TimeoutError) as e:
+            logger.opt(exception=True).warning(
+                "Failed to reconnect to the PandA, retrying"
+            )
+            await self._blocks.diagnostics.record_connection_status(
+                f"Reconnecting: {type(e).__name__}: {e}"
+            )
+            return
+        except (RuntimeError, CommandError) as e:
+            # E.g. the PandA's firmware or design has changed. Raising would end the
+            # scan for good, so keep retrying and show why instead.
+            logger.opt(exception=True).error(
+                "Failed to resync with the PandA after reconnecting, retrying"
+            )
+            await self._blocks.diagnostics.record_connection_status(
+                f"Reconnecting: {type(e).__name__}: {e}"
+            )
+            return
+        self._reconnect_needed = False
+        self._consecutive_scan_timeouts = 0
+        await self._blocks.diagnostics.record_connection_status("Connected")
+
+    @scan(POLL_TICK)
     async def update(self):
+        if self._reconnect_needed:
+            await self._try_reconnect()
+            return
+
+        change_groups = self._change_group_scheduler.due(time.monotonic())
+        if not change_groups:
+            return
+
         try:
-            changes = await self._raw_panda.get_changes()
-            results = await asyncio.gather(
-                *[
-                    self.update_field_value(PandaName.from_string(n), v)
-                    for n, v in changes.items()
-                ],
-                return_exceptions=True,
+            async with asyncio.timeout(self._scan_cycle_budget):
+                (
+                    changes,
+                    failures,
+                    get_changes_time,
+                    dispatch_time,
+                ) = await self._poll_changes(change_groups)
+        except TimeoutError:
+            # Changes received but not applied are lost, so fetch every field again.
+            logger.error(
+                "Polling for changes exceeded its budget, resyncing next poll",
+                budget=self._scan_cycle_budget,
             )
-            failures = [
-                (raw_panda_name, result)
-                for (raw_panda_name, _), result in zip(
-                    changes.items(), results, strict=False
+            self._resync_needed = True
+            self._consecutive_scan_timeouts += 1
+            if self._consecutive_scan_timeouts >= RECONNECT_AFTER_SCAN_TIMEOUTS:
+                self._reconnect_needed = True
+                await self._blocks.diagnostics.record_connection_status(
+                    "Connection lost: polls repeatedly exceeded their budget"
                 )
-                if isinstance(result, Exception)
-            ]
-            if failures:
-                for raw_panda_name, exc in failures:
-                    logger.opt(exception=exc).error(
-                        f"Failed to update field {raw_panda_name}"
-                    )
+            await self._blocks.diagnostics.record_timeouts(
+                self._raw_panda.timed_out_commands, scan_timed_out=True
+            )
+            return
+        except OSError as e:
+            logger.opt(exception=True).error("Lost connection to the PandA")
+            self._reconnect_needed = True
+            await self._blocks.diagnostics.record_connection_status(
+                f"Connection lost: {type(e).__name__}: {e}"
+            )
+            return
         # TODO: General exception is not ideal; narrow this dowm.
         except Exception as e:
             raise RuntimeError(
                 "Failed to update changes from PandaBlocks client"
             ) from e
+
+        await self._blocks.diagnostics.record_poll(
+            get_changes_time=get_changes_time,
+            dispatch_time=dispatch_time,
+            num_changes=len(changes),
+            num_failures=len(failures),
+            poll_period=self._change_group_scheduler.poll_period(change_groups),
+            queue_wait_times=self._raw_panda.queue_wait_times,
+        )
+        await self._blocks.diagnostics.record_timeouts(
+            self._raw_panda.timed_out_commands, scan_timed_out=False
+        )
+        self._consecutive_scan_timeouts = 0
+
+        if changes:
+            await self._reset_poll_period()
+        else:
+            await self._back_off_poll_period()
@@ -0,0 +1,84 @@
+"""
+Scheduling for polling each `ChangeGroup` of ``*CHANGES`` at its own period.
+"""
+
+from pandablocks.commands import ChangeGroup
+
+#: Every change group which can be polled individually.
+CHANGE_GROUPS = [group for group in ChangeGroup if group is not ChangeGroup.ALL]
+
+
+def parse_change_group_poll_periods(
+    default_period: float, poll_periods: dict[str, float]
+) -> dict[ChangeGroup, float]:
+    """Get a poll period for every change group from ``poll_periods``, keyed by
+    `ChangeGroup` name, falling back to ``default_period`` for any not given."""
+
+    unknown_names = set(poll_periods) - {group.name for group in CHANGE_GROUPS}
+    if unknown_names:
+        raise ValueError(
+            f"Unknown change groups {sorted(unknown_names)}, expected any of "
+            f"{[group.name for group in CHANGE_GROUPS]}."
+        )
+
+    change_group_poll_periods = {
+        group: poll_periods.get(group.name, default_period) for group in CHANGE_GROUPS
+    }
+    for group, period in change_group_poll_periods.items():
+        if period <= 0:
+            raise ValueError(f"Poll period for {group.name} must be positive.")
+
+    return change_group_poll_periods
+
+
+class ChangeGroupScheduler:
+    """Keeps track of when each `ChangeGroup` is next due to be polled.
+
+    `due` is expected to be called every ``tick`` seconds, so poll periods are
+    effectively rounded to a multiple of the tick. Every poll period is multiplied
+    by `period_scale`, which is used to back off polling when the PandA is idle.
+    """
+
+    def __init__(self, poll_periods: dict[ChangeGroup, float], tick: float):
+        self.poll_periods = poll_periods
+        self.period_scale = 1.0
+        self._tick = tick
+        self._last_polled = dict.fromkeys(poll_periods, float("-inf"))
+        self._next_due = dict.fromkeys(poll_periods, float("-inf"))
+
+    def _next_due_after(self, group: ChangeGroup, polled_at: float) -> float:
+        # Half a tick of slack so jitter in the tick doesn't skip a whole one.
+        return polled_at + self.poll_periods[group] * self.period_scale - self._tick / 2
+
+    def set_period_scale(self, period_scale: float):
+        """Scale every poll period, rescheduling each group's next poll relative to
+        when it was last polled."""
+
+        self.period_scale = period_scale
+        for group, last_polled in self._last_polled.items():
+            self._next_due[group] = self._next_due_after(group, last_polled)
+
+    def poll_period(self, groups: list[ChangeGroup]) -> float:
+        """Get the shortest current poll period of ``groups``."""
+
+        if groups == [ChangeGroup.ALL]:
+            groups = CHANGE_GROUPS
+        return min(self.poll_periods[group] for group in groups) * self.period_scale
+
+    def due(self, now: float) -> list[ChangeGroup]:
+        """Get the groups due to be polled at ``now`` and reschedule them.
+
+        If every group is due then `ChangeGroup.ALL` is returned instead, so that
+        they can be fetched with a single ``*CHANGES`` request.
+        """
+
+        due_groups = [
+            group for group, next_due in self._next_due.items() if now >= next_due
+        ]
+        for group in due_groups:
+            self._last_polled[group] = now
+            self._next_due[group] = self._next_due_after(group, now)
+
+        if len(due_groups) == len(CHANGE_GROUPS):
+            return [ChangeGroup.ALL]
+        return due_groups
@@ -0,0 +1,169 @@
+"""
+Vectorised conversion between the words of a table field and the structured array
+of its `Table` attribute.
+"""
+
+import warnings
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+from pandablocks.responses import TableFieldInfo
+
+
+@dataclass(frozen=True)
+class _PackedField:
+    name: str
+    word_offset: int
+    bit_offset: int
+    bit_length: int
+    signed: bool
+    labels: npt.NDArray[np.str_] | None
+
+    @property
+    def mask(self) -> np.uint32:
+        return np.uint32((1 << self.bit_length) - 1)
+
+
+class TableCodec:
+    """Packs and unpacks the words of a table field.
+
+    Rather than going through a dict of columns like `pandablocks.utils`, the words
+    are converted to a ``(rows, row_words)`` ``uint32`` array once and every bit
+    field is shifted and masked straight into (or out of) its column of the
+    structured array, so the only per-row Python work left is parsing and
+    formatting the words themselves.
+    """
+
+    def __init__(
+        self, structured_dtype: npt.DTypeLike, table_field_info: TableFieldInfo
+    ):
+        self.structured_dtype = np.dtype(structured_dtype)
+        self.row_words = table_field_info.row_words
+        self._fields = [
+            _PackedField(
+                name=field_name.lower(),
+                word_offset=details.bit_low // 32,
+                bit_offset=details.bit_low % 32,
+                bit_length=details.bit_high - details.bit_low + 1,
+                signed=details.subtype == "int",
+                labels=np.array(details.labels) if details.subtype == "enum" else None,
+            )
+            for field_name, details in table_field_info.fields.items()
+        ]
+        # Labels sorted for `np.searchsorted`, with the index each one had.
+        self._sorted_labels = {
+            field.name: (order, field.labels[order])
+            for field in self._fields
+            if field.labels is not None
+            for order in [np.argsort(field.labels)]
+        }
+
+    def words_to_packed(self, words: list[str]) -> npt.NDArray[np.uint32]:
+        """Parse the words received from the panda into one row per table row."""
+
+        # Parsing one joined string is much faster than converting each word.
+        # numpy warns, rather than raising, if it can't parse every word.
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            packed = np.fromstring(" ".join(words), dtype=np.uint32, sep=" ")
+        if len(packed) != len(words):
+            raise ValueError(f"Table words must all be uint32, got {words}")
+        return packed.reshape(-1, self.row_words)
+
+    def packed_to_words(self, packed: npt.NDArray[np.uint32]) -> list[str]:
+        """Format packed rows as the words sent to the panda."""
+
+        return [str(word) for word in packed.ravel().tolist()]
+
+    def unpack(self, packed: npt.NDArray[np.uint32]) -> np.ndarray:
+        """Extract every field of the packed rows into the structured array."""
+
+        table = np.zeros(len(packed), self.structured_dtype)
+        for field in self._fields:
+            column = (packed[:, field.word_offset] >> field.bit_offset) & field.mask
+            if field.labels is not None:
+                if len(column) and column.max() >= len(field.labels):
+                    raise ValueError(
+                        f"Table field {field.name} has label index "
+                        f"{column.max()}, but only {len(field.labels)} labels."
+                    )
+                table[field.name] = field.labels[column]
+            elif field.signed:
+                sign_bit = 1 << (field.bit_length - 1)
+                table[field.name] = (column.astype(np.int64) ^ sign_bit) - sign_bit
+            else:
+                table[field.name] = column
+        return table
+
+    def pack(self, table: np.ndarray) -> npt.NDArray[np.uint32]:
+        """Pack every field of the structured array into rows of words."""
+
+        packed = np.zeros((len(table), self.row_words), dtype=np.uint32)
+        for field in self._fields:
+            if field.labels is not None:
+                column = self._labels_to_indices(field, table[field.name])
+            else:
+                # Via int64 so negative values are masked to their two's complement.
+                column = table[field.name].astype(np.int64)
+            packed[:, field.word_offset] |= (
+                (column & field.mask) << field.bit_offset
+            ).astype(np.uint32)
+        return packed
+
+    def _labels_to_indices(
+        self, field: _PackedField, column: npt.NDArray[np.str_]
+    ) -> npt.NDArray[np.int64]:
+        assert field.labels is not None
+        order, sorted_labels = self._sorted_labels[field.name]
+        positions = np.searchsorted(sorted_labels, column)
+        positions = positions.clip(max=len(sorted_labels) - 1)
+        unknown = sorted_labels[positions] != column
+        if unknown.any():
+            raise ValueError(
+                f"{str(column[unknown][0])!r} is not a valid label for table "
+                f"field {field.name}, expected any of {field.labels.tolist()}."
+            )
+        return order[positions].astype(np.int64)
+
+    def decode(self, words: list[str]) -> np.ndarray:
+        """Convert the words received from the panda to the attribute value."""
+
+        return self.unpack(self.words_to_packed(words))
+
+    def encode(self, table: np.ndarray) -> list[str]:
+        """Convert the attribute value to the words sent to the panda."""
+
+        return self.packed_to_words(self.pack(table))
+
+
+def chunk_table_rows(
+    rows: np.ndarray | Iterable[np.ndarray], chunk_rows: int
+) -> Iterator[np.ndarray]:
+    """Regroup ``rows`` of a table into chunks of ``chunk_rows`` rows.
+
+    ``rows`` is either a structured array, or an iterable of structured arrays or
+    single rows which is only consumed as each chunk is needed. Only the last chunk
+    can be shorter than ``chunk_rows``.
+    """
+
+    if chunk_rows < 1:
+        raise ValueError(f"Chunks must be at least one row, got {chunk_rows}.")
+
+    pending: list[np.ndarray] = []
+    pending_rows = 0
+    for block in [rows] if isinstance(rows, np.ndarray) else rows:
+        block = np.atleast_1d(block)
+        while len(block):
+            taken, block = (
+                block[: chunk_rows - pending_rows],
+                block[chunk_rows - pending_rows :],
+            )
+            pending.append(taken)
+            pending_rows += len(taken)
+            if pending_rows == chunk_rows:
+                yield np.concatenate(pending)
+                pending, pending_rows = [], 0
+    if pending:
+        yield np.concatenate(pending)
@@ -1,7 +1,23 @@
+import operator
+from collections.abc import Callable, Coroutine
 from typing import Any
 
 import numpy as np
-from fastcs.datatypes import Bool, DataType, Enum, Float, Int, String, Table
+from fastcs.attributes import AttributeIO, AttributeIORefT, AttrW
+from fastcs.datatypes import (
+    Bool,
+    DataType,
+    DType_T,
+    Enum,
+    Float,
+    Int,
+    String,
+    Table,
+)
+from pandablocks.responses import TableFieldInfo
+
+from fastcs_pandablocks.panda.table_codec import TableCodec
+from fastcs_pandablocks.types import PandaName
 
 
 def panda_value_to_attribute_value(fastcs_datatype: DataType, value: str | dict) -> Any:
@@ -50,3 +66,159 @@ def attribute_value_to_panda_value(fastcs_datatype: DataType, value: Any) -> str
             return panda_value
         case _:
             raise NotImplementedError(f"Unknown datatype {fastcs_datatype}")
+
+
+#: Converts a single value or list of words received from the panda.
+PandaValueDecoder = Callable[[Any], Any]
+#: Converts an attribute value to a single value or list of words for the panda.
+PandaValueEncoder = Callable[[Any], str | list[str]]
+#: Called by an IO once a value has been sent, with the field, attribute, value, and
+#: the raw value put to the panda, or None if only part of the value was sent.
+OnSendCallback = Callable[
+    [PandaName, AttrW, Any, str | list[str] | None], Coroutine[None, None, None]
+]
+#: Puts a raw value to a field of the panda.
+PutValueToPanda = Callable[[PandaName, DataType, Any], Coroutine[None, None, None]]
+
+
+class OnSendIO(AttributeIO[DType_T, AttributeIORefT]):
+    """Base of the IOs which call an `OnSendCallback` after sending a value."""
+
+    def __init__(self, on_send: OnSendCallback | None = None):
+        #: Called after each value is sent to the panda.
+        self._on_send = on_send
+        super().__init__()
+
+
+async def put_encoded_value(
+    attr: AttrW,
+    value: Any,
+    panda_name: PandaName,
+    encode: PandaValueEncoder | None,
+    put_value_to_panda: PutValueToPanda,
+    on_send: OnSendCallback | None,
+):
+    """Encode ``value``, put it to ``panda_name`` then call ``on_send``.
+
+    ``encode`` is set by `Blocks` once the attribute is introspected, until then
+    values are encoded with `attribute_value_to_panda_value`.
+    """
+
+    if encode is not None:
+        panda_value = encode(value)
+    else:
+        panda_value = attribute_value_to_panda_value(attr.datatype, value)
+        assert isinstance(panda_value, str)
+    await put_value_to_panda(panda_name, attr.datatype, panda_value)
+    if on_send is not None:
+        await on_send(panda_name, attr, value, panda_value)
+
+
+class TableDecoder:
+    """Decodes the words of a table field into the attribute's structured array.
+
+    The words and array from the previous call are kept, so that when a table is
+    edited only the rows which changed are decoded and patched into a copy of the
+    previous array. The whole table is decoded if its length changes.
+
+    As this is the last known value of the table on the panda, it is also used by
+    `TableFieldIO` to work out what needs sending, and updated after each send.
+    """
+
+    def __init__(self, fastcs_datatype: Table, table_field_info: TableFieldInfo):
+        self.codec = TableCodec(fastcs_datatype.structured_dtype, table_field_info)
+        self._packed: np.ndarray | None = None
+        self._table: np.ndarray | None = None
+
+    @property
+    def packed(self) -> np.ndarray | None:
+        """The packed words of the last known table, if there is one."""
+        return self._packed
+
+    def set_known_value(self, packed: np.ndarray, table: np.ndarray):
+        """Record ``table`` as the value on the panda, e.g. once it has been sent."""
+        self._packed, self._table = packed, table
+
+    def forget_known_value(self):
+        """Forget the last known table, e.g. while it is streamed to the panda."""
+        self._packed, self._table = None, None
+
+    def __call__(self, words: str | list[str]) -> np.ndarray:
+        if not isinstance(words, list):
+            raise ValueError(f"Table value must be a list of words: {words}")
+        packed = self.codec.words_to_packed(words)
+
+        if (
+            self._packed is None
+            or self._table is None
+            or packed.shape != self._packed.shape
+        ):
+            table = self.codec.unpack(packed)
+        else:
+            changed_rows = np.flatnonzero((packed != self._packed).any(axis=1))
+            if len(changed_rows) == 0:
+                table = self._table
+            else:
+                table = self._table.copy()
+                table[changed_rows] = self.codec.unpack(packed[changed_rows])
+
+        self._packed, self._table = packed, table
+        return table
+
+
+def make_panda_value_decoder(
+    fastcs_datatype: DataType, table_field_info: TableFieldInfo | None = None
+) -> PandaValueDecoder:
+    """Builds a function converting a raw value received in ``*CHANGES`` to the
+    attribute value.
+
+    Equivalent to `panda_value_to_attribute_value`, but the datatype is only
+    dispatched on once so the returned function is cheap to call for every change.
+    Tables are decoded straight from the list of words, so need ``table_field_info``.
+    """
+
+    match fastcs_datatype:
+        case String():
+            return fastcs_datatype.validate
+        case Bool():
+            return lambda value: bool(int(value))
+        case Int() | Float() if (
+            fastcs_datatype.min is None and fastcs_datatype.max is None
+        ):
+            return fastcs_datatype.dtype
+        case Int() | Float():
+            return fastcs_datatype.validate
+        case Enum():
+            return fastcs_datatype.enum_cls.__getitem__
+        case Table():
+            if table_field_info is None:
+                raise ValueError(f"{fastcs_datatype} requires a TableFieldInfo")
+            return TableDecoder(fastcs_datatype, table_field_info)
+        case _:
+            raise NotImplementedError(f"Unknown datatype {fastcs_datatype}")
+
+
+def make_panda_value_encoder(
+    fastcs_datatype: DataType, table_field_info: TableFieldInfo | None = None
+) -> PandaValueEncoder:
+    """Builds a function converting an attribute value to the raw value ``Put`` to
+    the panda.
+
+    The inverse of `make_panda_value_decoder`, tables are encoded to a list of words.
+    """
+
+    match fastcs_datatype:
+        case String():
+            return str
+        case Bool():
+            return lambda value: str(int(value))
+        case Int() | Float():
+            return str
+        case Enum():
+            return operator.attrgetter("name")
+        case Table():
+            if table_field_info is None:
+                raise ValueError(f"{fastcs_datatype} requires a TableFieldInfo")
+            return TableCodec(fastcs_datatype.structured_dtype, table_field_info).encode
+        case _:
+            raise NotImplementedError(f"Unknown datatype {fastcs_datatype}")
@@ -1,9 +1,11 @@
 from enum import Enum
 
 from ._annotations import (
+    InitialValuesIndexType,
     RawBlocksType,
     RawFieldsType,
     RawInitialValuesType,
+    RawLabelsType,
     ResponseType,
 )
 from ._string_types import (
@@ -24,11 +26,13 @@ class WidgetGroup(Enum):
 
 
 __all__ = [
+    "InitialValuesIndexType",
     "PANDA_SEPARATOR",
     "PandaName",
     "ResponseType",
     "RawBlocksType",
     "RawFieldsType",
     "RawInitialValuesType",
+    "RawLabelsType",
     "WidgetGroup",
 ]
@@ -39,4 +39,8 @@ ResponseType = Union[
 
 RawBlocksType = dict[PandaName, BlockInfo]
 RawFieldsType = list[dict[PandaName, ResponseType]]
-RawInitialValuesType = dict[PandaName, str]
+#: The value of each field, a list of words for tables.
+RawInitialValuesType = dict[PandaName, str | list[str]]
+RawLabelsType = dict[PandaName, str]
+#: Initial values grouped by block, then by field, each keyed by its full name.
+InitialValuesIndexType = dict[PandaName, dict[str | None, RawInitialValuesType]]
@@ -0,0 +1,48 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from fastcs.attributes import AttrR, AttrRW
+from fastcs.datatypes import Int, Table
+
+from fastcs_pandablocks.panda.blocks import BlockController
+from fastcs_pandablocks.panda.blocks.block_controller import UPLOADED_ROWS
+from fastcs_pandablocks.panda.io.table import TableFieldIORef
+from fastcs_pandablocks.panda.utils import TableDecoder
+from fastcs_pandablocks.types import PandaName
+
+
+@pytest.mark.asyncio
+async def test_upload_table_streams_and_publishes_progress(
+    table_field_info, table_structured_dtype
+):
+    block_name = PandaName.from_string("SEQ1")
+    table_name = block_name + PandaName(field="TABLE")
+    datatype = Table(table_structured_dtype)
+    decoder = TableDecoder(datatype, table_field_info)
+    table = decoder(["1", "0", "100"])
+
+    async def upload_table_to_panda(panda_name, rows, encode, chunk_rows, on_progress):
+        assert panda_name == table_name
+        assert encode(rows) == ["1", "0", "100"]
+        await on_progress(len(rows))
+
+    block = BlockController(
+        block_name, AsyncMock(), upload_table_to_panda=upload_table_to_panda
+    )
+    block.add_attribute(
+        table_name,
+        AttrRW(
+            datatype,
+            io_ref=TableFieldIORef(
+                table_name, table_field_info, AsyncMock(), AsyncMock(), decoder
+            ),
+        ),
+    )
+    uploaded_rows = AttrR(Int())
+    block.add_attribute(table_name + UPLOADED_ROWS, uploaded_rows)
+
+    await block.upload_table("TABLE", table)
+
+    assert uploaded_rows.get() == 1
+    # The table isn't known again until the panda reports it
+    assert decoder.packed is None
@@ -1,11 +1,14 @@
 from dataclasses import dataclass, field
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
+import pytest
 from fastcs.attributes import AttrRW
 from fastcs.datatypes import Bool
+from pandablocks.responses import BlockInfo, UintFieldInfo
 
 from fastcs_pandablocks.panda.blocks import BlockController, Blocks
-from fastcs_pandablocks.types import PandaName
+from fastcs_pandablocks.panda.blocks.blocks import index_initial_values
+from fastcs_pandablocks.types import PandaName, RawInitialValuesType
 
 
 @dataclass
@@ -51,3 +54,105 @@ def test_get_attribute_returns_none_for_unknown_field_on_known_block():
     panda_name = PandaName.from_string("PULSE1.UNKNOWN_FIELD")
 
     assert blocks.get_attribute(panda_name) is None
+
+
+def test_get_attribute_from_raw_name_uses_wire_string():
+    """Attributes indexed after introspection should be found by the exact
+    string the PandA sends in *CHANGES, and unknown names should return None."""
+    blocks = Blocks(MagicMock(), [])
+
+    units_attribute = AttrRW(Bool())
+    blocks._index_attribute(
+        PandaName.from_string("PULSE2.WIDTH.UNITS"), units_attribute
+    )
+
+    assert blocks.get_attribute_from_raw_name("PULSE2.WIDTH.UNITS") is units_attribute
+    assert blocks.get_attribute_from_raw_name("PULSE2.WIDTH") is None
+    assert blocks.get_attribute_from_raw_name("*METADATA.LAYOUT") is None
+
+
+def test_index_initial_values_groups_by_block_and_field():
+    initial_values: RawInitialValuesType = {
+        PandaName.from_string(name): value
+        for name, value in {
+            "PULSE1.WIDTH": "1.0",
+            "PULSE1.WIDTH.UNITS": "s",
+            "PULSE2.WIDTH": "2.0",
+            "PCAP.TRIG_EDGE": "Rising",
+        }.items()
+    }
+
+    index = index_initial_values(initial_values)
+
+    assert index[PandaName.from_string("PULSE1")] == {
+        "WIDTH": {
+            PandaName.from_string("PULSE1.WIDTH"): "1.0",
+            PandaName.from_string("PULSE1.WIDTH.UNITS"): "s",
+        }
+    }
+    assert index[PandaName.from_string("PULSE2")] == {
+        "WIDTH": {PandaName.from_string("PULSE2.WIDTH"): "2.0"}
+    }
+    assert index[PandaName("PCAP")] == {
+        "TRIG_EDGE": {PandaName.from_string("PCAP.TRIG_EDGE"): "Rising"}
+    }
+
+
+@pytest.mark.asyncio
+async def test_blocks_are_built_as_field_infos_arrive():
+    """Each block should be built from its fields as they arrive, but registered
+    in the order the PandA listed the blocks."""
+    uint_param = UintFieldInfo("param", "uint", None, max_val=10)
+    raw_panda = MagicMock()
+    raw_panda.get_blocks = AsyncMock(
+        return_value={
+            PandaName("PULSE"): BlockInfo(number=2),
+            PandaName("PCAP"): BlockInfo(number=1),
+        }
+    )
+    raw_panda.get_initial_values = AsyncMock(
+        return_value=(
+            {PandaName.from_string("PULSE2"): "Second pulse"},
+            {
+                PandaName.from_string(name): value
+                for name, value in {
+                    "PULSE1.WIDTH": "1",
+                    "PULSE2.WIDTH": "2",
+                    "PCAP.GATE": "3",
+                }.items()
+            },
+        )
+    )
+
+    async def get_field_infos(blocks):
+        yield PandaName("PCAP"), {PandaName(field="GATE"): uint_param}
+        yield PandaName("PULSE"), {PandaName(field="WIDTH"): uint_param}
+
+    raw_panda.get_field_infos = get_field_infos
+    blocks = Blocks(raw_panda, [])
+
+    await blocks.parse_introspected_data()
+
+    assert [str(name) for name in blocks._introspected_controllers] == [
+        "PULSE1",
+        "PULSE2",
+        "PCAP",
+    ]
+    assert list(blocks._additional_controllers) == ["PULSE"]
+    assert blocks._introspected_controllers[PandaName("PULSE", 2)].description == (
+        "Second pulse"
+    )
+    width = blocks.get_attribute_from_raw_name("PULSE2.WIDTH")
+    assert isinstance(width, AttrRW) and width.get() == 2
+    assert blocks.raw_initial_values == {
+        "PULSE1.WIDTH": "1",
+        "PULSE2.WIDTH": "2",
+        "PCAP.GATE": "3",
+    }
+    assert set(blocks.introspection_times) == {
+        "blocks",
+        "initial_values",
+        "field_infos",
+        "build",
+        "total",
+    }
@@ -0,0 +1,92 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from pandablocks.responses import (
+    EndData,
+    EndReason,
+    FieldCapture,
+    FrameData,
+    StartData,
+)
+
+from fastcs_pandablocks.panda.blocks.data import CaptureMode, HDF5Buffer
+
+START_DATA = StartData(
+    fields=[
+        FieldCapture("COUNTER1.OUT", np.dtype("int32"), "Value", 1.0, 0.0, ""),
+        FieldCapture("PCAP.BITS0", np.dtype("uint32"), "Value", None, None, None),
+    ],
+    missed=0,
+    process="Raw",
+    format="Framed",
+    sample_bytes=8,
+    arm_time=None,
+    start_time=None,
+    hw_time_offset_ns=None,
+)
+FRAME_DTYPE = np.dtype([("COUNTER1.OUT.Value", "<i4"), ("PCAP.BITS0.Value", "<u4")])
+
+
+def frame(start: int, stop: int) -> FrameData:
+    return FrameData(
+        np.array([(row, row * 2) for row in range(start, stop)], dtype=FRAME_DTYPE)
+    )
+
+
+@pytest.fixture
+def last_n_buffer(tmp_path):
+    with patch(
+        "fastcs_pandablocks.panda.blocks.data.create_pipeline",
+        return_value=[MagicMock()],
+    ):
+        buffer = HDF5Buffer(
+            CaptureMode.LAST_N,
+            tmp_path / "capture.h5",
+            5,
+            AsyncMock(),
+            AsyncMock(),
+            MagicMock(),
+            {},
+        )
+    buffer.put_data_to_file = AsyncMock()
+    return buffer
+
+
+@pytest.mark.asyncio
+async def test_last_n_keeps_the_last_rows_in_order(last_n_buffer):
+    await last_n_buffer.handle_data(START_DATA)
+    assert last_n_buffer.circular_buffer is not None
+    preallocated = last_n_buffer.circular_buffer
+
+    for start, stop in ((0, 3), (3, 4), (4, 8), (8, 10)):
+        await last_n_buffer.handle_data(frame(start, stop))
+    await last_n_buffer.handle_data(EndData(10, EndReason.OK))
+
+    assert last_n_buffer.circular_buffer is preallocated
+    assert last_n_buffer.number_of_received_rows == 10
+    written = [call.args[0] for call in last_n_buffer.put_data_to_file.call_args_list]
+    assert written[0] == START_DATA
+    assert (written[1].data == frame(5, 10).data).all()
+    assert isinstance(written[2], EndData)
+
+
+@pytest.mark.asyncio
+async def test_last_n_frame_larger_than_buffer(last_n_buffer):
+    await last_n_buffer.handle_data(START_DATA)
+    await last_n_buffer.handle_data(frame(0, 2))
+    await last_n_buffer.handle_data(frame(2, 14))
+    await last_n_buffer.handle_data(EndData(14, EndReason.MANUALLY_STOPPED))
+
+    written = last_n_buffer.put_data_to_file.call_args_list[1].args[0]
+    assert (written.data == frame(9, 14).data).all()
+
+
+@pytest.mark.asyncio
+async def test_last_n_writes_partially_filled_buffer(last_n_buffer):
+    await last_n_buffer.handle_data(START_DATA)
+    await last_n_buffer.handle_data(frame(0, 3))
+    await last_n_buffer.handle_data(EndData(3, EndReason.OK))
+
+    written = last_n_buffer.put_data_to_file.call_args_list[1].args[0]
+    assert (written.data == frame(0, 3).data).all()
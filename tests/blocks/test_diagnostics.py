@@ -0,0 +1,50 @@
+import pytest
+
+from fastcs_pandablocks.panda.blocks.diagnostics import (
+    ROLLING_UPDATE_INTERVAL,
+    DiagnosticsController,
+)
+from fastcs_pandablocks.panda.command_scheduler import CommandPriority
+
+
+@pytest.mark.asyncio
+async def test_record_poll_publishes_last_poll_and_counts_overruns():
+    diagnostics = DiagnosticsController()
+
+    await diagnostics.record_poll(0.01, 0.002, 5, 1, poll_period=0.1)
+    await diagnostics.record_poll(0.09, 0.02, 3, 0, poll_period=0.1)
+
+    assert diagnostics.get_changes_time.get() == 0.09
+    assert diagnostics.dispatch_time.get() == 0.02
+    assert diagnostics.num_changes.get() == 3
+    assert diagnostics.num_failures.get() == 0
+    assert diagnostics.scan_overruns.get() == 1
+
+
+@pytest.mark.asyncio
+async def test_record_poll_publishes_rolling_statistics():
+    diagnostics = DiagnosticsController()
+
+    for poll in range(1, ROLLING_UPDATE_INTERVAL + 1):
+        assert diagnostics.get_changes_time_max.get() == 0
+        await diagnostics.record_poll(poll / 1000, poll / 10000, 1, 0, 1.0)
+
+    assert diagnostics.get_changes_time_p50.get() == pytest.approx(0.0055)
+    assert diagnostics.get_changes_time_p99.get() == pytest.approx(0.00991)
+    assert diagnostics.get_changes_time_max.get() == pytest.approx(0.01)
+    assert diagnostics.dispatch_time_max.get() == pytest.approx(0.001)
+
+
+@pytest.mark.asyncio
+async def test_record_poll_publishes_queue_wait_times():
+    diagnostics = DiagnosticsController()
+    queue_wait_times = {CommandPriority.ARM: [0.001, 0.002], CommandPriority.PUT: []}
+
+    for _ in range(ROLLING_UPDATE_INTERVAL):
+        await diagnostics.record_poll(
+            0.01, 0.001, 1, 0, 1.0, queue_wait_times=queue_wait_times
+        )
+
+    assert diagnostics.arm_queue_wait_max.get() == pytest.approx(0.002)
+    assert diagnostics.arm_queue_wait_p99.get() == pytest.approx(0.00199)
+    assert diagnostics.put_queue_wait_max.get() == 0
@@ -0,0 +1,123 @@
+from unittest.mock import patch
+
+import h5py
+import numpy as np
+import pytest
+from pandablocks.hdf import FrameProcessor
+from pandablocks.responses import EndData, EndReason, FieldCapture, FrameData, StartData
+
+from fastcs_pandablocks.panda.blocks.hdf_writer import (
+    Compression,
+    DatasetLayout,
+    LayoutHDFWriter,
+)
+
+START_DATA = StartData(
+    fields=[FieldCapture("COUNTER1.OUT", np.dtype("int32"), "Value", 1.0, 0.0, "")],
+    missed=0,
+    process="Raw",
+    format="Framed",
+    sample_bytes=4,
+    arm_time=None,
+    start_time=None,
+    hw_time_offset_ns=None,
+)
+
+
+def write(filepath, layout: DatasetLayout, frames: list[range]) -> h5py.Dataset:
+    frame_processor = FrameProcessor()
+    writer = LayoutHDFWriter(iter([str(filepath)]), {}, layout)
+    writer.open_file(frame_processor.create_processors(START_DATA))
+    for rows in frames:
+        data = np.array([(row,) for row in rows], dtype=[("COUNTER1.OUT.Value", "<i4")])
+        writer.write_frame(frame_processor.scale_data(FrameData(data)))
+    writer.close_file(EndData(0, EndReason.OK))
+    dataset = h5py.File(filepath)["COUNTER1.OUT.Value"]
+    assert isinstance(dataset, h5py.Dataset)
+    return dataset
+
+
+@pytest.mark.parametrize(
+    "layout, compression, compression_opts",
+    [
+        (DatasetLayout(), None, None),
+        (
+            DatasetLayout(compression=Compression.GZIP, compression_level=6),
+            "gzip",
+            6,
+        ),
+        (DatasetLayout(compression=Compression.LZF, shuffle=True), "lzf", None),
+    ],
+)
+def test_datasets_are_created_with_layout(
+    tmp_path, layout, compression, compression_opts
+):
+    dataset = write(tmp_path / "capture.h5", layout, [range(10), range(10, 25)])
+
+    assert dataset.compression == compression
+    assert dataset.compression_opts == compression_opts
+    assert dataset.shuffle == layout.shuffle
+    assert (dataset[:] == np.arange(25)).all()
+
+
+def test_chunks_and_preallocated_rows(tmp_path):
+    dataset = write(
+        tmp_path / "capture.h5",
+        DatasetLayout(chunk_rows=16, preallocate_rows=100),
+        [range(10), range(10, 25)],
+    )
+
+    assert dataset.chunks == (16,)
+    # Trimmed to the rows written on close.
+    assert (dataset[:] == np.arange(25)).all()
+
+
+def test_preallocated_rows_grow_if_exceeded(tmp_path):
+    dataset = write(
+        tmp_path / "capture.h5",
+        DatasetLayout(preallocate_rows=8),
+        [range(5), range(5, 12)],
+    )
+
+    assert (dataset[:] == np.arange(12)).all()
+
+
+def frame_columns(rows: range) -> list[np.ndarray]:
+    return [np.array(rows, dtype=np.int32)]
+
+
+def test_swmr_datasets_are_flushed_every_flush_period(tmp_path):
+    filepath = tmp_path / "capture.h5"
+    writer = LayoutHDFWriter(
+        iter([str(filepath)]), {}, DatasetLayout(swmr=True, flush_period=60)
+    )
+    writer.open_file(FrameProcessor().create_processors(START_DATA))
+    assert writer.hdf_file is not None and writer.hdf_file.swmr_mode
+
+    with patch.object(h5py.Dataset, "flush") as flush:
+        writer.write_frame(frame_columns(range(10)))
+        assert flush.call_count == 1
+
+        # Not flushed again until the flush period has passed.
+        writer.write_frame(frame_columns(range(10, 20)))
+        assert flush.call_count == 1
+
+        writer._last_flush_time -= 60
+        writer.write_frame(frame_columns(range(20, 30)))
+        assert flush.call_count == 2
+
+    writer.close_file(EndData(30, EndReason.OK))
+    with h5py.File(filepath, "r", libver="latest", swmr=True) as reader:
+        dataset = reader["COUNTER1.OUT.Value"]
+        assert isinstance(dataset, h5py.Dataset)
+        assert (dataset[:] == np.arange(30)).all()
+
+
+def test_swmr_can_be_disabled(tmp_path):
+    filepath = tmp_path / "capture.h5"
+    writer = LayoutHDFWriter(iter([str(filepath)]), {}, DatasetLayout(swmr=False))
+    writer.open_file(FrameProcessor().create_processors(START_DATA))
+
+    assert writer.hdf_file is not None and not writer.hdf_file.swmr_mode
+    writer.write_frame(frame_columns(range(10)))
+    writer.close_file(EndData(10, EndReason.OK))
@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import h5py
+import numpy as np
+import pytest
+from pandablocks.responses import EndData, EndReason, FieldCapture, FrameData, StartData
+
+from fastcs_pandablocks.panda.blocks.hdf_writer_process import HDF5WriterProcess
+
+START_DATA = StartData(
+    fields=[
+        FieldCapture("COUNTER1.OUT", np.dtype("int32"), "Value", 1.0, 0.0, ""),
+        FieldCapture("PCAP.BITS0", np.dtype("uint32"), "Value", None, None, None),
+    ],
+    missed=0,
+    process="Raw",
+    format="Framed",
+    sample_bytes=8,
+    arm_time=None,
+    start_time=None,
+    hw_time_offset_ns=None,
+)
+FRAME_DTYPE = np.dtype([("COUNTER1.OUT.Value", "<i4"), ("PCAP.BITS0.Value", "<u4")])
+
+
+@pytest.mark.asyncio
+async def test_frames_are_written_through_a_small_ring(tmp_path):
+    """Frames larger than the ring, and more frames than fit in it at once, should
+    all be written in order."""
+    filepath = tmp_path / "capture.h5"
+    number_captured_setter = AsyncMock()
+    status_message_setter = AsyncMock()
+    writer = HDF5WriterProcess(
+        filepath,
+        {"COUNTER1.OUT": {"Value": "counter"}},
+        number_captured_setter,
+        status_message_setter,
+        MagicMock(return_value="Starting capture"),
+        ring_bytes=100,
+    )
+    rows = np.array([(row, row % 2) for row in range(100)], dtype=FRAME_DTYPE)
+
+    writer.start()
+    await writer.put(START_DATA)
+    for start_row in range(0, 60, 6):
+        await writer.put(FrameData(rows[start_row : start_row + 6]))
+    await writer.put(FrameData(rows[60:]))
+    await writer.put(EndData(100, EndReason.OK))
+    await writer.stop()
+
+    # The process takes far longer to start than filling the ring.
+    status_message_setter.assert_any_await("Waiting for HDF5 writer process")
+    # The status is restored once there is space again.
+    status_message_setter.assert_awaited_with("Starting capture")
+    number_captured_setter.assert_awaited_with(100)
+    with h5py.File(filepath) as hdf_file:
+        counter, bits = hdf_file["counter"], hdf_file["PCAP.BITS0.Value"]
+        assert isinstance(counter, h5py.Dataset) and isinstance(bits, h5py.Dataset)
+        assert (counter[:] == rows["COUNTER1.OUT.Value"]).all()
+        assert (bits[:] == rows["PCAP.BITS0.Value"]).all()
@@ -0,0 +1,37 @@
+import pytest
+from pandablocks.responses import TableFieldDetails, TableFieldInfo
+
+
+@pytest.fixture
+def table_field_info() -> TableFieldInfo:
+    """A cut down version of the SEQ table, packing three words per row."""
+    return TableFieldInfo(
+        type="table",
+        subtype=None,
+        description="Sequencer table of lines",
+        max_length=4096,
+        fields={
+            "REPEATS": TableFieldDetails(subtype="uint", bit_low=0, bit_high=15),
+            "TRIGGER": TableFieldDetails(
+                subtype="enum",
+                bit_low=16,
+                bit_high=19,
+                labels=["Immediate", "BITA=0", "BITA=1", "POSA>=POSITION"],
+            ),
+            "OUTA1": TableFieldDetails(subtype="uint", bit_low=20, bit_high=20),
+            "POSITION": TableFieldDetails(subtype="int", bit_low=32, bit_high=63),
+            "TIME1": TableFieldDetails(subtype="uint", bit_low=64, bit_high=95),
+        },
+        row_words=3,
+    )
+
+
+@pytest.fixture
+def table_structured_dtype() -> list:
+    return [
+        ("repeats", "<u4"),
+        ("trigger", "<U16"),
+        ("outa1", "<u4"),
+        ("position", "<i4"),
+        ("time1", "<u4"),
+    ]
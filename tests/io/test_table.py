@@ -0,0 +1,137 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import numpy as np
+import pytest
+from fastcs.attributes import AttrRW
+from fastcs.datatypes import Table
+
+from fastcs_pandablocks.panda.io.table import TableFieldIO, TableFieldIORef
+from fastcs_pandablocks.panda.utils import TableDecoder
+from fastcs_pandablocks.types import PandaName
+
+WORDS = ["1", "0", "100", str(0x00120005), str(0xFFFFFFFF), "7"]
+
+
+@pytest.fixture
+def attribute(table_field_info, table_structured_dtype):
+    datatype = Table(table_structured_dtype)
+    decoder = TableDecoder(datatype, table_field_info)
+    decoder(WORDS)
+    return AttrRW(
+        datatype,
+        io_ref=TableFieldIORef(
+            PandaName.from_string("SEQ1.TABLE"),
+            table_field_info,
+            AsyncMock(),
+            AsyncMock(),
+            decoder=decoder,
+        ),
+    )
+
+
+@pytest.fixture
+def table(attribute):
+    return attribute.io_ref.decoder(WORDS)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_table_is_not_sent(attribute, table):
+    on_send = AsyncMock()
+
+    await TableFieldIO(on_send=on_send, poll_tables=AsyncMock()).send(
+        attribute, table.copy()
+    )
+
+    attribute.io_ref.put_value_to_panda.assert_not_called()
+    attribute.io_ref.append_table_to_panda.assert_not_called()
+    on_send.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_extended_table_only_appends_new_rows(attribute, table):
+    extended_table = np.concatenate([table, table[:1]])
+
+    await TableFieldIO(poll_tables=AsyncMock()).send(attribute, extended_table)
+
+    attribute.io_ref.put_value_to_panda.assert_not_called()
+    attribute.io_ref.append_table_to_panda.assert_awaited_once_with(
+        attribute.io_ref.panda_name, WORDS[:3]
+    )
+    assert attribute.io_ref.decoder.packed.ravel().tolist() == [
+        int(word) for word in WORDS + WORDS[:3]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_edited_table_is_sent_whole_and_becomes_known(attribute, table):
+    edited_table = table.copy()
+    edited_table["repeats"][1] = 6
+
+    await TableFieldIO(poll_tables=AsyncMock()).send(attribute, edited_table)
+    attribute.io_ref.put_value_to_panda.assert_awaited_once_with(
+        attribute.io_ref.panda_name,
+        attribute.datatype,
+        WORDS[:3] + [str(0x00120006)] + WORDS[4:],
+    )
+
+    # Sending the same table again is then a no-op
+    await TableFieldIO(poll_tables=AsyncMock()).send(attribute, edited_table.copy())
+    attribute.io_ref.put_value_to_panda.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_overlapping_appends_each_send_only_their_new_rows(attribute, table):
+    appended = []
+
+    async def slow_append(panda_name, words):
+        await asyncio.sleep(0.01)
+        appended.append(words)
+
+    attribute.io_ref.append_table_to_panda.side_effect = slow_append
+    first_append = np.concatenate([table, table[:1]])
+    second_append = np.concatenate([first_append, table[1:]])
+
+    await asyncio.gather(
+        TableFieldIO(poll_tables=AsyncMock()).send(attribute, first_append),
+        TableFieldIO(poll_tables=AsyncMock()).send(attribute, second_append),
+    )
+
+    assert appended == [WORDS[:3], WORDS[3:]]
+    assert attribute.io_ref.decoder.packed.ravel().tolist() == [
+        int(word) for word in WORDS + WORDS
+    ]
+
+
+@pytest.mark.asyncio
+async def test_table_changed_by_another_writer_is_sent_whole(attribute, table):
+    """Tables are polled before sending, so a table another client has written
+    since the last poll isn't treated as unchanged, or appended to."""
+    other_words = WORDS[:3] + [str(0x00120006)] + WORDS[4:]
+
+    async def poll_tables():
+        attribute.io_ref.decoder(other_words)
+
+    extended_table = np.concatenate([table, table[:1]])
+    for value in (table.copy(), extended_table):
+        attribute.io_ref.put_value_to_panda.reset_mock()
+        await TableFieldIO(poll_tables=poll_tables).send(attribute, value)
+
+        attribute.io_ref.append_table_to_panda.assert_not_called()
+        attribute.io_ref.put_value_to_panda.assert_awaited_once_with(
+            attribute.io_ref.panda_name,
+            attribute.datatype,
+            attribute.io_ref.decoder.codec.encode(value),
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("poll_tables", [None, AsyncMock(side_effect=ConnectionError)])
+async def test_table_is_sent_whole_unless_tables_were_polled(
+    attribute, table, poll_tables
+):
+    await TableFieldIO(poll_tables=poll_tables).send(attribute, table.copy())
+
+    attribute.io_ref.put_value_to_panda.assert_awaited_once_with(
+        attribute.io_ref.panda_name, attribute.datatype, WORDS
+    )
@@ -0,0 +1,250 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from pandablocks.commands import Exchange, Put
+from pandablocks.responses import Changes
+
+from fastcs_pandablocks.panda.client_wrapper import (
+    COMMAND_TIMEOUT,
+    AppendTable,
+    RawPanda,
+)
+from fastcs_pandablocks.panda.command_scheduler import CommandPriority
+from fastcs_pandablocks.types import PandaName
+
+
+@pytest.fixture
+def raw_panda():
+    raw_panda = RawPanda("localhost", changes_log_interval=3)
+    raw_panda._client.send = AsyncMock(
+        return_value=Changes({"PULSE1.WIDTH": "1"}, [], [], {"SEQ1.TABLE": ["1"]})
+    )
+    return raw_panda
+
+
+@pytest.mark.asyncio
+async def test_payloads_are_not_formatted_when_debug_logging_is_disabled(raw_panda):
+    with patch("fastcs_pandablocks.panda.client_wrapper.pformat") as mock_pformat:
+        changes = await raw_panda.get_changes()
+        await raw_panda.send("PULSE1.WIDTH", "2")
+        await raw_panda.get("PULSE1.WIDTH")
+
+    assert changes == {"PULSE1.WIDTH": "1", "SEQ1.TABLE": ["1"]}
+    mock_pformat.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_only_every_nth_changes_reply_is_logged(raw_panda):
+    with patch("fastcs_pandablocks.panda.client_wrapper.logger", MagicMock()) as log:
+        for _ in range(7):
+            await raw_panda.get_changes()
+
+    assert log.opt.return_value.debug.call_count == 2
+
+
+@pytest.mark.parametrize("changes_log_interval", [0, -1])
+def test_changes_log_interval_must_be_positive(changes_log_interval):
+    with pytest.raises(ValueError, match="changes_log_interval"):
+        RawPanda("localhost", changes_log_interval=changes_log_interval)
+
+
+def test_append_table_uses_append_syntax():
+    exchange = next(AppendTable("SEQ1.TABLE", ["1", "2"]).execute((0, 0)))
+
+    assert isinstance(exchange, Exchange)
+    assert exchange.to_send == ["SEQ1.TABLE<<", "1", "2", ""]
+
+
+@pytest.mark.asyncio
+async def test_upload_table_streams_chunks(raw_panda):
+    rows = np.array([(i,) for i in range(5)], dtype=[("repeats", "<u4")])
+    on_progress = AsyncMock()
+
+    await raw_panda.upload_table_to_panda(
+        PandaName.from_string("SEQ1.TABLE"),
+        iter(rows),
+        lambda chunk: [str(repeats) for repeats in chunk["repeats"]],
+        chunk_rows=2,
+        on_progress=on_progress,
+    )
+
+    assert [call.args[0] for call in raw_panda._client.send.await_args_list] == [
+        Put("SEQ1.TABLE", ["0", "1"]),
+        AppendTable("SEQ1.TABLE", ["2", "3"]),
+        AppendTable("SEQ1.TABLE", ["4"]),
+    ]
+    assert [call.args[0] for call in on_progress.await_args_list] == [2, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_upload_empty_table_clears_it(raw_panda):
+    await raw_panda.upload_table_to_panda(
+        PandaName.from_string("SEQ1.TABLE"), [], lambda chunk: []
+    )
+
+    raw_panda._client.send.assert_awaited_once_with(
+        Put("SEQ1.TABLE", []), timeout=COMMAND_TIMEOUT
+    )
+
+
+@pytest.mark.asyncio
+async def test_puts_in_a_burst_are_coalesced_and_sent_together(raw_panda):
+    in_flight, max_in_flight = 0, 0
+
+    async def send(command, timeout):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+
+    raw_panda._client.send = AsyncMock(side_effect=send)
+
+    await asyncio.gather(
+        raw_panda.send("PULSE1.WIDTH", "1"),
+        raw_panda.send("PULSE1.DELAY", "2"),
+        raw_panda.send("PULSE1.WIDTH", "3"),
+    )
+
+    assert [call.args[0] for call in raw_panda._client.send.await_args_list] == [
+        Put("PULSE1.WIDTH", "3"),
+        Put("PULSE1.DELAY", "2"),
+    ]
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_each_put_gets_its_own_result(raw_panda):
+    async def send(command, timeout):
+        if command.field == "PULSE1.DELAY":
+            raise ValueError("Bad delay")
+
+    raw_panda._client.send = AsyncMock(side_effect=send)
+
+    width, delay = await asyncio.gather(
+        raw_panda.send("PULSE1.WIDTH", "1"),
+        raw_panda.send("PULSE1.DELAY", "-1"),
+        return_exceptions=True,
+    )
+
+    assert width is None
+    assert isinstance(delay, ValueError)
+
+
+@pytest.mark.asyncio
+async def test_puts_in_flight_fail_when_reconnecting(raw_panda):
+    put_sent = asyncio.Event()
+
+    async def send(command, timeout):
+        put_sent.set()
+        await asyncio.Event().wait()  # The old connection never replies
+
+    raw_panda._client.send = AsyncMock(side_effect=send)
+    raw_panda._client.close = AsyncMock()
+    put = asyncio.create_task(raw_panda.send("PULSE1.WIDTH", "1"))
+    await put_sent.wait()
+
+    with patch("fastcs_pandablocks.panda.client_wrapper.AsyncioClient") as client:
+        client.return_value.connect = AsyncMock()
+        await raw_panda.reconnect()
+
+    with pytest.raises(ConnectionError, match="Disconnected"):
+        await asyncio.wait_for(put, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_queued_puts_fail_when_disconnecting(raw_panda):
+    raw_panda._client.close = AsyncMock()
+    put = asyncio.create_task(raw_panda.send("PULSE1.WIDTH", "1"))
+    await asyncio.sleep(0)  # Queued, but the sender hasn't run yet
+
+    await raw_panda.disconnect()
+
+    with pytest.raises(ConnectionError, match="Disconnected"):
+        await asyncio.wait_for(put, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_polls_can_use_their_own_connection():
+    raw_panda = RawPanda("localhost", poll_connection=True)
+    raw_panda._client.send = AsyncMock()
+    raw_panda._poll_client.send = AsyncMock(return_value=Changes({}, [], [], {}))
+
+    await raw_panda.get_changes()
+    await raw_panda.send("PULSE1.WIDTH", "1")
+    await raw_panda.arm()
+
+    raw_panda._poll_client.send.assert_awaited_once()
+    assert raw_panda._client.send.await_count == 2
+    assert len(raw_panda.queue_wait_times[CommandPriority.POLL]) == 1
+
+
+@pytest.mark.asyncio
+async def test_timed_out_commands_are_counted(raw_panda):
+    raw_panda._client.send = AsyncMock(side_effect=TimeoutError)
+
+    with pytest.raises(TimeoutError):
+        await raw_panda.arm()
+    with pytest.raises(TimeoutError):
+        await raw_panda.get_changes()
+
+    assert raw_panda.timed_out_commands == 2
+
+
+@pytest.mark.asyncio
+async def test_field_infos_are_requested_together_and_yielded_as_they_arrive(
+    raw_panda,
+):
+    replies = {block: asyncio.Event() for block in ("PULSE", "SEQ")}
+    sent = []
+
+    async def send(command, timeout):
+        sent.append(command.block)
+        await replies[command.block].wait()
+        return {"WIDTH": command.block}
+
+    raw_panda._client.send = send
+    field_infos = raw_panda.get_field_infos([PandaName("PULSE"), PandaName("SEQ")])
+    await asyncio.sleep(0)
+    assert sent == ["PULSE", "SEQ"]
+
+    replies["SEQ"].set()
+    assert await anext(field_infos) == (
+        PandaName("SEQ"),
+        {PandaName(field="WIDTH"): "SEQ"},
+    )
+    replies["PULSE"].set()
+    assert await anext(field_infos) == (
+        PandaName("PULSE"),
+        {PandaName(field="WIDTH"): "PULSE"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_introspection_fans_out_up_to_max_commands_in_flight():
+    raw_panda = RawPanda("localhost", max_commands_in_flight=6)
+    blocks = [PandaName(f"BLOCK{letter}") for letter in "ABCDEFGH"]
+    reply, in_flight, max_in_flight = asyncio.Event(), 0, 0
+
+    async def send(command, timeout):
+        nonlocal in_flight, max_in_flight
+        if isinstance(command, Put):
+            return
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await reply.wait()
+        in_flight -= 1
+        return {}
+
+    raw_panda._client.send = AsyncMock(side_effect=send)
+    field_infos = raw_panda.get_field_infos(blocks)
+    await asyncio.sleep(0)
+    assert in_flight == 6
+
+    # A put isn't held back behind the introspection commands
+    await asyncio.wait_for(raw_panda.send("PULSE1.WIDTH", "1"), timeout=0.1)
+    reply.set()
+    assert len([block async for block, _ in field_infos]) == len(blocks)
+    assert max_in_flight == 6
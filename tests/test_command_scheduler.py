@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from fastcs_pandablocks.panda.command_scheduler import (
+    CommandPriority,
+    CommandScheduler,
+)
+
+
+async def _run(scheduler, priority, name, order, release):
+    async with scheduler.slot(priority):
+        order.append(name)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_waiting_commands_go_in_priority_then_arrival_order():
+    scheduler = CommandScheduler(max_in_flight=1)
+    order, release = [], asyncio.Event()
+
+    tasks = [
+        asyncio.create_task(_run(scheduler, priority, name, order, release))
+        for priority, name in [
+            (CommandPriority.POLL, "first poll"),
+            (CommandPriority.INTROSPECTION, "introspection"),
+            (CommandPriority.POLL, "second poll"),
+        ]
+    ]
+    await asyncio.sleep(0)
+    assert order == ["first poll"]
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert order == ["first poll", "second poll", "introspection"]
+    assert len(scheduler.queue_wait_times[CommandPriority.POLL]) == 2
+    assert scheduler._in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_arms_and_puts_are_not_held_back_by_the_limit():
+    scheduler = CommandScheduler(max_in_flight=1)
+    order, release = [], asyncio.Event()
+
+    tasks = [
+        asyncio.create_task(_run(scheduler, priority, name, order, release))
+        for priority, name in [
+            (CommandPriority.POLL, "first poll"),
+            (CommandPriority.POLL, "second poll"),
+            (CommandPriority.PUT, "put"),
+            (CommandPriority.ARM, "arm"),
+        ]
+    ]
+    await asyncio.sleep(0)
+    assert order == ["first poll", "put", "arm"]
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler._in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_hold_a_slot():
+    scheduler = CommandScheduler(max_in_flight=1)
+    order, release = [], asyncio.Event()
+
+    running = asyncio.create_task(
+        _run(scheduler, CommandPriority.INTROSPECTION, "introspection", order, release)
+    )
+    cancelled = asyncio.create_task(
+        _run(scheduler, CommandPriority.POLL, "cancelled", order, release)
+    )
+    waiting = asyncio.create_task(
+        _run(scheduler, CommandPriority.POLL, "poll", order, release)
+    )
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    release.set()
+    await asyncio.gather(running, waiting)
+
+    assert order == ["introspection", "poll"]
+    assert scheduler._in_flight == 0
@@ -0,0 +1,83 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pandablocks.responses import BlockInfo, EnumFieldInfo, FieldInfo, TableFieldInfo
+
+from fastcs_pandablocks.panda.blocks import Blocks
+from fastcs_pandablocks.panda.introspection_cache import IntrospectionCache
+from fastcs_pandablocks.types import PandaName
+
+
+@pytest.fixture
+def layout(table_field_info: TableFieldInfo):
+    blocks = {
+        PandaName("SEQ"): BlockInfo(number=2, description="Sequencer"),
+        PandaName("PCAP"): BlockInfo(number=1, description=None),
+    }
+    field_infos = [
+        {
+            PandaName(field="TABLE"): table_field_info,
+            PandaName(field="ENABLE"): FieldInfo("bit_mux", None, "Enable"),
+        },
+        {
+            PandaName(field="TRIG_EDGE"): EnumFieldInfo(
+                "param", "enum", "Trigger edge", labels=["Rising", "Falling"]
+            ),
+        },
+    ]
+    return blocks, field_infos
+
+
+def test_cache_round_trips_layout(tmp_path, layout):
+    cache = IntrospectionCache(tmp_path / "cache")
+    cache.save("PandA SW: 4.0", "seq_design", *layout)
+
+    assert cache.load("PandA SW: 4.0", "seq_design") == layout
+    assert cache.load("PandA SW: 4.0", "other_design") is None
+    assert cache.load("PandA SW: 3.0", "seq_design") is None
+
+
+def test_cache_ignores_unreadable_file(tmp_path):
+    cache = IntrospectionCache(tmp_path)
+    cache.path("PandA SW: 4.0", "").write_text("{not json")
+
+    assert cache.load("PandA SW: 4.0", "") is None
+
+
+@pytest.mark.asyncio
+async def test_cached_layout_is_used_and_validated(tmp_path, layout):
+    cache = IntrospectionCache(tmp_path)
+    cache.save("PandA SW: 4.0", "seq_design", *layout)
+
+    live_blocks = {**layout[0], PandaName("PULSE"): BlockInfo(number=4)}
+    live_layout = (live_blocks, [*layout[1], {}])
+    raw_panda = MagicMock()
+    raw_panda.get = AsyncMock(
+        side_effect=lambda name: {
+            "*IDN": "PandA SW: 4.0",
+            "*METADATA.DESIGN": "seq_design",
+        }[name]
+    )
+    raw_panda.get_layout = AsyncMock(return_value=live_layout)
+    blocks = Blocks(raw_panda, ios=[], introspection_cache=cache)
+
+    assert await blocks._get_cached_layout(cache) == layout
+
+    assert blocks.layout_validation is not None
+    await blocks.layout_validation
+    raw_panda.get_layout.assert_awaited_once()
+    assert cache.load("PandA SW: 4.0", "seq_design") == live_layout
+
+
+@pytest.mark.asyncio
+async def test_missing_layout_is_introspected_and_cached(tmp_path, layout):
+    cache = IntrospectionCache(tmp_path)
+    raw_panda = MagicMock()
+    raw_panda.get = AsyncMock(return_value="PandA SW: 4.0")
+    raw_panda.get_layout = AsyncMock(return_value=layout)
+    blocks = Blocks(raw_panda, ios=[], introspection_cache=cache)
+
+    assert await blocks._get_cached_layout(cache) == layout
+
+    assert blocks.layout_validation is None
+    assert cache.load("PandA SW: 4.0", "PandA SW: 4.0") == layout
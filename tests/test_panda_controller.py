@@ -1,28 +1,35 @@
+import asyncio
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from fastcs.attributes import AttrR
+from fastcs.attributes import AttrR, AttrRW
 from fastcs.datatypes import Int
+from pandablocks.commands import ChangeGroup, CommandError
 
-from fastcs_pandablocks.panda.panda_controller import PandaController
+from fastcs_pandablocks.panda.io.default import DefaultFieldIORef
+from fastcs_pandablocks.panda.panda_controller import (
+    PandaController,
+    PandaControllerSettings,
+)
 from fastcs_pandablocks.types import PandaName
 
 
 @pytest.fixture
 def panda_name():
-    return PandaName.from_string("PULSE1.WIDTH")
+    return "PULSE1.WIDTH"
 
 
 @pytest.fixture
 def controller():
-    return PandaController(MagicMock())
+    return PandaController(PandaControllerSettings("localhost"))
 
 
 @pytest.mark.asyncio
 async def test_update_field_value_gets_attribute_and_updates(controller, panda_name):
     """A panda name's attribute should be updated with coerced value."""
     attribute = AttrR(Int())
-    controller._blocks.get_attribute = MagicMock(return_value=attribute)
+    controller._blocks._index_attribute(PandaName.from_string(panda_name), attribute)
 
     await controller.update_field_value(panda_name, "10")
 
@@ -35,7 +42,7 @@ async def test_update_field_value_logs_and_skips_on_coerce_failure(
 ):
     """A ValueError from coercion should be caught and logged, not raised."""
     attribute = AttrR(Int())
-    controller._blocks.get_attribute = MagicMock(return_value=attribute)
+    controller._blocks._index_attribute(PandaName.from_string(panda_name), attribute)
 
     with patch("fastcs_pandablocks.panda.panda_controller.logger") as mock_logger:
         await controller.update_field_value(panda_name, "not_an_int")
@@ -49,7 +56,7 @@ async def test_update_field_value_logs_and_skips_on_failed_field_lookup(
     controller, panda_name
 ):
     """An error from a missing field should be caught and logged, not raised."""
-    controller._blocks.get_attribute = MagicMock(return_value=None)
+    controller._blocks.get_attribute_from_raw_name = MagicMock(return_value=None)
 
     with patch("fastcs_pandablocks.panda.panda_controller.logger") as mock_logger:
         await controller.update_field_value(panda_name, "1")
@@ -76,20 +83,45 @@ async def test_update_all_fields_succeed_no_error(controller):
     assert controller.update_field_value.await_count == 2
 
 
+@pytest.mark.asyncio
+async def test_update_skips_values_unchanged_since_last_seen(controller):
+    """Values identical to the last raw value seen for a field shouldn't be
+    decoded or dispatched again, but should be counted."""
+    controller.update_field_value = AsyncMock(return_value=None)
+    controller._raw_panda.get_changes = AsyncMock(
+        return_value={"PULSE1.WIDTH": "42", "SEQ1.TABLE": ["1", "2"]}
+    )
+    await controller.update()
+
+    controller._raw_panda.get_changes.return_value = {
+        "PULSE1.WIDTH": "43",
+        "SEQ1.TABLE": ["1", "2"],
+    }
+    with patch("time.monotonic", return_value=time.monotonic() + 1):
+        await controller.update()
+
+    assert [call.args for call in controller.update_field_value.await_args_list] == [
+        ("PULSE1.WIDTH", "42"),
+        ("SEQ1.TABLE", ["1", "2"]),
+        ("PULSE1.WIDTH", "43"),
+    ]
+    assert controller._blocks.diagnostics.suppressed_updates.get() == 1
+
+
 @pytest.mark.asyncio
 async def test_update_logs_but_does_not_raise_on_single_field_failure(controller):
-    """One bad field (e.g. *METADATA producing an unexpected exception
+    """One bad field (e.g. one producing an unexpected exception
     somewhere downstream) should be logged, but must not prevent other
     fields updating or kill the scan task."""
     controller._raw_panda.get_changes = AsyncMock(
         return_value={
-            "*METADATA.LAYOUT": "some layout",
+            "BAD.FIELD": "some value",
             "PULSE1.WIDTH": "42",
         }
     )
 
-    async def fake_update_field_value(panda_name, value):
-        if str(panda_name).startswith("*METADATA"):
+    async def fake_update_field_value(raw_panda_name, value):
+        if raw_panda_name == "BAD.FIELD":
             raise RuntimeError("Some Exception")
 
     controller.update_field_value = AsyncMock(side_effect=fake_update_field_value)
@@ -107,21 +139,230 @@ async def test_update_logs_but_does_not_raise_on_single_field_failure(controller
 
     # Assert chained .error() call on opt() return
     mock_logger.opt.return_value.error.assert_called_once_with(
-        "Failed to update field *METADATA.LAYOUT"
+        "Failed to update field BAD.FIELD"
+    )
+
+
+@pytest.mark.asyncio
+async def test_update_only_polls_due_change_groups():
+    """Change groups should be requested separately when their poll periods
+    differ, and not at all until they are due again."""
+    controller = PandaController(
+        PandaControllerSettings(
+            "localhost", poll_period=1.0, change_group_poll_periods={"POSN": 0.05}
+        )
+    )
+    controller._raw_panda.get_changes = AsyncMock(return_value={})
+
+    await controller.update()
+    controller._raw_panda.get_changes.assert_awaited_once_with(ChangeGroup.ALL)
+
+    controller._raw_panda.get_changes.reset_mock()
+    with patch("time.monotonic", return_value=time.monotonic() + 0.1):
+        await controller.update()
+    controller._raw_panda.get_changes.assert_awaited_once_with(ChangeGroup.POSN)
+
+
+@pytest.mark.asyncio
+async def test_update_backs_off_while_idle_and_resets_on_changes():
+    controller = PandaController(
+        PandaControllerSettings("localhost", poll_period=0.1, max_poll_period=0.5)
+    )
+    controller._raw_panda.get_changes = AsyncMock(return_value={})
+    now = time.monotonic()
+
+    poll_periods = []
+    for tick in range(100):
+        with patch("time.monotonic", return_value=now + tick * 0.05):
+            await controller.update()
+        poll_periods.append(controller.poll_period.get())
+
+    assert poll_periods[0] == pytest.approx(0.2)
+    assert poll_periods[-1] == pytest.approx(0.5)
+    # 0.1 + 0.2 + 0.4 + 0.5 * n
+    assert controller._raw_panda.get_changes.await_count == 11
+
+    controller._raw_panda.get_changes.return_value = {"PULSE1.WIDTH": "1"}
+    controller.update_field_value = AsyncMock()
+    with patch("time.monotonic", return_value=now + 6.0):
+        await controller.update()
+    assert controller.poll_period.get() == pytest.approx(0.1)
+
+
+@pytest.mark.asyncio
+async def test_put_resets_backed_off_poll_period():
+    controller = PandaController(
+        PandaControllerSettings("localhost", poll_period=0.1, max_poll_period=1.0)
     )
+    await controller._set_poll_period(0.8)
+    assert controller.poll_period.get() == pytest.approx(0.8)
+
+    controller._raw_panda.send = AsyncMock()
+    attribute = AttrRW(
+        Int(),
+        io_ref=DefaultFieldIORef(
+            PandaName.from_string("PULSE1.WIDTH"),
+            controller._raw_panda.put_value_to_panda,
+        ),
+    )
+    await controller._ios[1].send(attribute, 5)
+
+    controller._raw_panda.send.assert_awaited_once_with("PULSE1.WIDTH", "5")
+    assert controller.poll_period.get() == pytest.approx(0.1)
+
+
+@pytest.mark.asyncio
+async def test_apply_changes_updates_in_order_and_reports_failures(controller):
+    updated = []
+
+    async def fake_update_field_value(raw_panda_name, value):
+        if raw_panda_name == "BAD.FIELD":
+            raise ValueError("Bad field")
+        updated.append(raw_panda_name)
+
+    controller.update_field_value = AsyncMock(side_effect=fake_update_field_value)
+
+    failures = await controller.apply_changes(
+        {"PULSE1.WIDTH": "1", "BAD.FIELD": "2", "PULSE2.WIDTH": "3"}
+    )
+
+    assert updated == ["PULSE1.WIDTH", "PULSE2.WIDTH"]
+    assert list(failures) == ["BAD.FIELD"]
+    assert str(failures["BAD.FIELD"]) == "Bad field"
 
 
 @pytest.mark.asyncio
 async def test_update_raises_runtime_error_when_get_changes_fails(controller):
     """A failure fetching changes from the PandA itself should still
-    surface as a RuntimeError (this is a connection-level failure,
-    not a per-field one)."""
+    surface as a RuntimeError (this is not a per-field failure)."""
+    controller._raw_panda.get_changes = AsyncMock(side_effect=ValueError("bad reply"))
+    with pytest.raises(RuntimeError, match="Failed to update changes"):
+        await controller.update()
+
+
+@pytest.mark.asyncio
+async def test_update_reconnects_when_connection_is_lost(controller):
+    """A lost connection should be recovered from with a reconnect and a single
+    *CHANGES, applying only the values which differ from those last seen."""
     controller._raw_panda.get_changes = AsyncMock(
         side_effect=ConnectionError("disconnected")
     )
-    with pytest.raises(RuntimeError, match="Failed to update changes"):
+    controller._last_raw_values = {"PULSE1.WIDTH": "1", "PULSE2.WIDTH": "2"}
+    with patch("fastcs_pandablocks.panda.panda_controller.logger"):
+        await controller.update()
+
+    controller._raw_panda.reconnect = AsyncMock()
+    controller._blocks.verify_layout = AsyncMock()
+    controller._raw_panda.get_changes = AsyncMock(
+        return_value={"PULSE1.WIDTH": "1", "PULSE2.WIDTH": "3"}
+    )
+    controller.update_field_value = AsyncMock()
+
+    await controller.update()
+
+    controller._raw_panda.reconnect.assert_awaited_once()
+    controller._blocks.verify_layout.assert_awaited_once()
+    controller.update_field_value.assert_awaited_once_with("PULSE2.WIDTH", "3")
+    assert controller._blocks.diagnostics.reconnects.get() == 1
+    assert not controller._reconnect_needed
+
+
+@pytest.mark.asyncio
+async def test_reconnect_only_applies_fields_changed_since_introspection(controller):
+    controller._raw_panda.connect = AsyncMock()
+    controller._blocks.parse_introspected_data = AsyncMock()
+    controller._blocks.setup_post_introspection = AsyncMock()
+    controller._blocks.raw_initial_values = {
+        "PULSE1.WIDTH": "1",
+        "SEQ1.TABLE": ["1", "2", "3", "4"],
+    }
+    await controller.connect()
+
+    controller._raw_panda.reconnect = AsyncMock()
+    controller._blocks.verify_layout = AsyncMock()
+    controller._raw_panda.get_changes = AsyncMock(
+        return_value={
+            "PULSE1.WIDTH": "1",
+            "PULSE1.DELAY": "2",
+            "SEQ1.TABLE": ["1", "2", "3", "4"],
+            "*METADATA.LABEL_PULSE1": "First pulse",
+        }
+    )
+    controller.update_field_value = AsyncMock()
+
+    with patch("fastcs_pandablocks.panda.panda_controller.logger") as mock_logger:
+        await controller.reconnect()
+
+    controller.update_field_value.assert_awaited_once_with("PULSE1.DELAY", "2")
+    mock_logger.opt.return_value.error.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_first_poll_on_poll_connection_only_applies_changed_fields():
+    """The first poll on its own connection reports every field, but only those
+    changed since introspection should be applied."""
+    controller = PandaController(
+        PandaControllerSettings("localhost", poll_connection=True)
+    )
+    controller._raw_panda.connect = AsyncMock()
+    controller._blocks.parse_introspected_data = AsyncMock()
+    controller._blocks.setup_post_introspection = AsyncMock()
+    controller._blocks.raw_initial_values = {
+        "PULSE1.WIDTH": "1",
+        "PULSE1.DELAY": "2",
+    }
+    await controller.connect()
+
+    controller._raw_panda.get_changes = AsyncMock(
+        return_value={"PULSE1.WIDTH": "1", "PULSE1.DELAY": "3"}
+    )
+    controller.update_field_value = AsyncMock()
+    await controller.update()
+
+    controller.update_field_value.assert_awaited_once_with("PULSE1.DELAY", "3")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "error, status",
+    [
+        pytest.param(
+            RuntimeError("PandA identity changed"), "identity changed", id="layout"
+        ),
+        pytest.param(CommandError("Bad reply"), "Bad reply", id="command_error"),
+    ],
+)
+async def test_failed_resync_keeps_retrying_and_shows_why(controller, error, status):
+    """Errors resyncing after reconnecting mustn't end the scan, but should keep
+    retrying with the reason published."""
+    controller._reconnect_needed = True
+    controller.reconnect = AsyncMock(side_effect=error)
+
+    with patch("fastcs_pandablocks.panda.panda_controller.logger"):
         await controller.update()
 
+    controller.reconnect.assert_awaited_once()
+    assert controller._reconnect_needed
+    connection_status = controller._blocks.diagnostics.connection_status.get()
+    assert connection_status.startswith("Reconnecting:")
+    assert status in connection_status
+
+    controller.reconnect = AsyncMock()
+    controller._next_reconnect_time = float("-inf")
+    await controller.update()
+    assert not controller._reconnect_needed
+    assert controller._blocks.diagnostics.connection_status.get() == "Connected"
+
+
+@pytest.mark.asyncio
+async def test_reconnect_fails_if_layout_changed(controller):
+    controller._raw_panda.reconnect = AsyncMock()
+    controller._raw_panda.get = AsyncMock(return_value="PandA SW: 4.0")
+    controller._blocks._idn = "PandA SW: 3.0"
+
+    with pytest.raises(RuntimeError, match="identity changed"):
+        await controller.reconnect()
+
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
@@ -159,3 +400,78 @@ async def test_initialise_registers_correct_blocks(
     else:
         controller.add_sub_controller.assert_not_called()
         mock_block.initialise.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_echo_of_sent_value_is_dropped(controller, panda_name):
+    controller._raw_panda.send = AsyncMock()
+    attribute = AttrRW(
+        Int(),
+        io_ref=DefaultFieldIORef(
+            PandaName.from_string(panda_name),
+            controller._raw_panda.put_value_to_panda,
+        ),
+    )
+    controller._blocks._index_attribute(PandaName.from_string(panda_name), attribute)
+    await controller._ios[1].send(attribute, 5)
+
+    # The readback is published once the put succeeds
+    assert attribute.get() == 5
+
+    assert await controller._drop_unchanged_values({panda_name: "5"}) == {}
+    assert await controller._drop_unchanged_values({panda_name: "6"}) == {
+        panda_name: "6"
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_exceeding_budget_is_abandoned_then_resyncs():
+    controller = PandaController(
+        PandaControllerSettings("localhost", scan_cycle_budget=0.01)
+    )
+    # asyncio.timeout relies on time.monotonic, so it can't be patched here
+    controller._change_group_scheduler.due = MagicMock(return_value=[ChangeGroup.ALL])
+
+    async def stalled_get_changes(group):
+        await asyncio.sleep(1)
+
+    controller._raw_panda.get_changes = AsyncMock(side_effect=stalled_get_changes)
+    controller._raw_panda.timed_out_commands = 1
+    controller._last_raw_values = {"PULSE1.WIDTH": "1"}
+
+    with patch("fastcs_pandablocks.panda.panda_controller.logger") as mock_logger:
+        await controller.update()
+
+    mock_logger.error.assert_called_once()
+    diagnostics = controller._blocks.diagnostics
+    assert diagnostics.scan_timeouts.get() == 1
+    assert diagnostics.timed_out_commands.get() == 1
+
+    controller._raw_panda.get_changes = AsyncMock(return_value={"PULSE1.WIDTH": "1"})
+    controller._raw_panda.reset_changes = AsyncMock()
+    controller.update_field_value = AsyncMock()
+
+    await controller.update()
+
+    controller._raw_panda.reset_changes.assert_awaited_once()
+    controller.update_field_value.assert_awaited_once_with("PULSE1.WIDTH", "1")
+
+
+@pytest.mark.asyncio
+async def test_tables_are_polled_and_appends_forget_the_last_value(controller):
+    controller._last_raw_values = {"SEQ1.TABLE": ["1", "2", "3", "4"]}
+    attribute = AttrRW(Int())
+
+    await controller._on_send(PandaName.from_string("SEQ1.TABLE"), attribute, 0, None)
+    assert "SEQ1.TABLE" not in controller._last_raw_values
+
+    controller._raw_panda.get_changes = AsyncMock(
+        return_value={"SEQ1.TABLE": ["1", "2", "3", "4"]}
+    )
+    controller.update_field_value = AsyncMock()
+    await controller._poll_tables()
+
+    controller._raw_panda.get_changes.assert_awaited_once_with(ChangeGroup.TABLE)
+    controller.update_field_value.assert_awaited_once_with(
+        "SEQ1.TABLE", ["1", "2", "3", "4"]
+    )
@@ -0,0 +1,60 @@
+import pytest
+from pandablocks.commands import ChangeGroup
+
+from fastcs_pandablocks.panda.scheduler import (
+    CHANGE_GROUPS,
+    ChangeGroupScheduler,
+    parse_change_group_poll_periods,
+)
+
+
+def test_parse_change_group_poll_periods_uses_default():
+    poll_periods = parse_change_group_poll_periods(0.1, {"TABLE": 1.0})
+    assert set(poll_periods) == set(CHANGE_GROUPS)
+    assert poll_periods[ChangeGroup.TABLE] == 1.0
+    assert poll_periods[ChangeGroup.POSN] == 0.1
+
+
+@pytest.mark.parametrize(
+    "poll_periods, message",
+    [
+        pytest.param({"POSITIONS": 1.0}, "Unknown change groups", id="unknown"),
+        pytest.param({"ALL": 1.0}, "Unknown change groups", id="all"),
+        pytest.param({"BITS": 0}, "must be positive", id="zero_period"),
+    ],
+)
+def test_parse_change_group_poll_periods_rejects_invalid(poll_periods, message):
+    with pytest.raises(ValueError, match=message):
+        parse_change_group_poll_periods(0.1, poll_periods)
+
+
+def test_scheduler_polls_all_groups_together_when_periods_match():
+    scheduler = ChangeGroupScheduler(dict.fromkeys(CHANGE_GROUPS, 0.1), tick=0.05)
+
+    assert scheduler.due(0.0) == [ChangeGroup.ALL]
+    assert scheduler.due(0.05) == []
+    assert scheduler.due(0.1) == [ChangeGroup.ALL]
+
+
+def test_scheduler_polls_groups_at_their_own_periods():
+    poll_periods = parse_change_group_poll_periods(1.0, {"POSN": 0.05, "BITS": 0.1})
+    scheduler = ChangeGroupScheduler(poll_periods, tick=0.05)
+
+    polled = [scheduler.due(tick * 0.05) for tick in range(21)]
+
+    assert polled[0] == [ChangeGroup.ALL]
+    assert all(ChangeGroup.POSN in groups for groups in polled[1:20])
+    bits_polled = [ChangeGroup.BITS in groups for groups in polled[1:5]]
+    assert bits_polled == [False, True, False, True]
+    assert polled[20] == [ChangeGroup.ALL]
+
+
+def test_scheduler_period_scale_brings_polls_forward():
+    scheduler = ChangeGroupScheduler(dict.fromkeys(CHANGE_GROUPS, 0.1), tick=0.05)
+    scheduler.set_period_scale(8)
+
+    assert scheduler.due(0.0) == [ChangeGroup.ALL]
+    assert scheduler.due(0.4) == []
+
+    scheduler.set_period_scale(1)
+    assert scheduler.due(0.45) == [ChangeGroup.ALL]
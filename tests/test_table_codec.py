@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from pandablocks.utils import table_to_words, words_to_table
+
+from fastcs_pandablocks.panda.table_codec import TableCodec, chunk_table_rows
+
+
+@pytest.fixture
+def codec(table_field_info, table_structured_dtype) -> TableCodec:
+    return TableCodec(table_structured_dtype, table_field_info)
+
+
+@pytest.fixture
+def random_words(table_field_info) -> list[str]:
+    rng = np.random.default_rng(seed=0)
+    packed = rng.integers(0, 2**32, size=(100, 3), dtype=np.uint32)
+    # Keep the trigger indices in range of its labels, and unused bits clear
+    packed[:, 0] &= 0x1FFFFF
+    packed[:, 0] &= ~np.uint32(0xC0000)
+    return [str(word) for word in packed.ravel().tolist()]
+
+
+def test_decode_matches_pandablocks(codec, table_field_info, random_words):
+    table = codec.decode(random_words)
+    expected = words_to_table(random_words, table_field_info, True)
+
+    for field_name, column in expected.items():
+        assert table[field_name.lower()].tolist() == list(column)
+
+
+def test_encode_matches_pandablocks(codec, table_field_info, random_words):
+    table = codec.decode(random_words)
+    columns = {name.upper(): table[name] for name in table.dtype.names}
+
+    assert codec.encode(table) == table_to_words(columns, table_field_info)  # type: ignore
+    assert codec.encode(table) == random_words
+
+
+def test_empty_table_round_trips(codec):
+    table = codec.decode([])
+
+    assert len(table) == 0
+    assert codec.encode(table) == []
+
+
+def test_decode_rejects_label_index_out_of_range(codec):
+    with pytest.raises(ValueError, match="only 4 labels"):
+        codec.decode([str(0xF << 16), "0", "0"])
+
+
+def test_encode_rejects_unknown_label(codec):
+    table = codec.decode(["0", "0", "0"])
+    table["trigger"] = "BITB=1"
+
+    with pytest.raises(ValueError, match="'BITB=1' is not a valid label"):
+        codec.encode(table)
+
+
+def test_decode_rejects_words_which_are_not_numbers(codec):
+    with pytest.raises(ValueError, match="must all be uint32"):
+        codec.decode(["1", "two", "3"])
+
+
+def test_chunk_table_rows_regroups_arrays_and_single_rows():
+    rows = np.array([(i,) for i in range(7)], dtype=[("repeats", "<u4")])
+
+    chunks = list(chunk_table_rows([rows[:3], rows[3], rows[4:]], chunk_rows=3))
+
+    assert [chunk["repeats"].tolist() for chunk in chunks] == [
+        [0, 1, 2],
+        [3, 4, 5],
+        [6],
+    ]
+    assert [len(chunk) for chunk in chunk_table_rows(rows, 7)] == [7]
@@ -0,0 +1,95 @@
+import enum
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastcs.datatypes import Bool, Enum, Float, Int, String, Table
+
+from fastcs_pandablocks.panda.utils import (
+    TableDecoder,
+    attribute_value_to_panda_value,
+    make_panda_value_decoder,
+    make_panda_value_encoder,
+    panda_value_to_attribute_value,
+)
+
+
+class Labels(enum.Enum):
+    ZERO = "ZERO"
+    PULSE1_OUT = "PULSE1.OUT"
+
+
+@pytest.mark.parametrize(
+    "datatype, panda_value",
+    [
+        pytest.param(String(), "some label", id="string"),
+        pytest.param(Bool(), "1", id="bool"),
+        pytest.param(Int(), "-12", id="int"),
+        pytest.param(Int(min=0, max=100), "12", id="bounded_int"),
+        pytest.param(Float(), "0.5", id="float"),
+        pytest.param(Enum(Labels), "PULSE1_OUT", id="enum"),
+    ],
+)
+def test_decoders_and_encoders_match_generic_conversion(datatype, panda_value):
+    """Precompiled coercers should agree with the match based conversion."""
+    attribute_value = make_panda_value_decoder(datatype)(panda_value)
+    assert attribute_value == panda_value_to_attribute_value(datatype, panda_value)
+    assert make_panda_value_encoder(datatype)(
+        attribute_value
+    ) == attribute_value_to_panda_value(datatype, attribute_value)
+
+
+def test_bounded_int_decoder_validates():
+    with pytest.raises(ValueError):
+        make_panda_value_decoder(Int(min=0, max=10))("11")
+
+
+def test_table_decoder_and_encoder_round_trip(table_field_info, table_structured_dtype):
+    datatype = Table(table_structured_dtype)
+    words = ["1", "0", "100", str(0x00120005), str(0xFFFFFFFF), "7"]
+
+    table = make_panda_value_decoder(datatype, table_field_info)(words)
+
+    assert table.dtype == np.dtype(table_structured_dtype)
+    assert table["repeats"].tolist() == [1, 5]
+    assert table["trigger"].tolist() == ["Immediate", "BITA=1"]
+    assert table["outa1"].tolist() == [0, 1]
+    assert table["position"].tolist() == [0, -1]
+    assert table["time1"].tolist() == [100, 7]
+    assert make_panda_value_encoder(datatype, table_field_info)(table) == words
+
+
+def test_table_coercers_require_field_info(table_structured_dtype):
+    with pytest.raises(ValueError, match="requires a TableFieldInfo"):
+        make_panda_value_decoder(Table(table_structured_dtype))
+
+
+def test_table_decoder_only_decodes_changed_rows(
+    table_field_info, table_structured_dtype
+):
+    decode = TableDecoder(Table(table_structured_dtype), table_field_info)
+    words = ["1", "0", "100", str(0x00120005), str(0xFFFFFFFF), "7"]
+    first_table = decode(words)
+
+    with patch.object(decode.codec, "unpack", wraps=decode.codec.unpack) as mock_unpack:
+        second_table = decode(words[:3] + ["6", "2", "8"])
+        assert mock_unpack.call_args.args[0].tolist() == [[6, 2, 8]]
+
+    assert second_table is not first_table
+    assert first_table["repeats"].tolist() == [1, 5]
+    assert second_table["repeats"].tolist() == [1, 6]
+    assert second_table["trigger"].tolist() == ["Immediate", "Immediate"]
+    assert second_table["position"].tolist() == [0, 2]
+    assert second_table["time1"].tolist() == [100, 8]
+
+
+def test_table_decoder_rebuilds_when_length_changes(
+    table_field_info, table_structured_dtype
+):
+    decode = make_panda_value_decoder(Table(table_structured_dtype), table_field_info)
+    words = ["1", "0", "100", str(0x00120005), str(0xFFFFFFFF), "7"]
+    decode(words)
+
+    assert decode(words[:3])["repeats"].tolist() == [1]
+    assert decode(words + words[:3])["repeats"].tolist() == [1, 5, 1]
+    assert len(decode([])) == 0